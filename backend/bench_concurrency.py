@@ -0,0 +1,87 @@
+"""Requests per second and latency of one endpoint at increasing client concurrency.
+
+The default, GET /chefs-choice, runs a Firestore query on every request, so it
+measures how many blocking I/O requests the worker's thread pool keeps in flight.
+POST bodies get a fresh random pantry per request: a fixed one would be served
+from the result cache after the first call and measure only the cache.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+PANTRY_POOL = [
+    "chicken", "rice", "onion", "tomato", "garlic", "beef", "egg", "potato", "carrot", "pepper",
+    "cheese", "milk", "butter", "flour", "pasta", "spinach", "mushroom", "lemon", "beans", "tofu",
+]
+PANTRY_SIZE = 5
+
+
+def random_pantry() -> dict:
+    return {"available_ingredients": random.sample(PANTRY_POOL, PANTRY_SIZE)}
+
+
+async def run_level(client: httpx.AsyncClient, method: str, path: str, body, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body() if body else None)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Requests per second at increasing client concurrency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/chefs-choice")
+    parser.add_argument("--method", default="GET", help="POST sends a random pantry, e.g. to /generate-recipes")
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--levels", default="1,10,100")
+    args = parser.parse_args()
+
+    body = random_pantry if args.method.upper() == "POST" else None
+    levels = [int(level) for level in args.levels.split(",")]
+
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        # Warm up caches and connections before measuring
+        await run_level(client, args.method, args.path, body, 1, 5)
+
+        print(f"{args.method} {args.path} against {args.url}")
+        print(f"{'clients':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for level in levels:
+            result = await run_level(client, args.method, args.path, body, level, args.requests)
+            print(f"{level:>8} {result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
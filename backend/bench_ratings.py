@@ -0,0 +1,87 @@
+import argparse
+import threading
+import time
+
+from database import db
+from rating_counters import RatingCounters
+
+BENCH_RECIPE = "hot-recipe"
+
+
+def legacy_rating(recipe_ref, rating: int) -> None:
+    # The read-modify-write RatingService.submit_rating used before sharding
+    data = recipe_ref.get().to_dict()
+    count = data.get("rating_count", 0)
+    average = data.get("average_rating", 0)
+    recipe_ref.update({
+        "average_rating": (average * count + rating) / (count + 1),
+        "rating_count": count + 1,
+    })
+
+
+def run(label: str, rate, threads: int, ratings: int) -> dict:
+    errors = 0
+    per_thread = ratings // threads
+
+    def worker():
+        nonlocal errors
+        for i in range(per_thread):
+            try:
+                rate(i % 5 + 1)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {"label": label, "sent": per_thread * threads, "errors": errors, "rps": round(per_thread * threads / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ratings per second on one hot recipe: read-modify-write, sharded counters, write-behind buffer")
+    parser.add_argument("--collection", default="bench_recipes", help="scratch collection, emptied of the bench recipe first")
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--ratings", type=int, default=400)
+    parser.add_argument("--shards", type=int, default=10)
+    args = parser.parse_args()
+
+    collection = db.collection(args.collection)
+    recipe_ref = collection.document(BENCH_RECIPE)
+    counters = RatingCounters(collection, args.shards)
+
+    def reset():
+        for shard in recipe_ref.collection("rating_shards").stream():
+            shard.reference.delete()
+        recipe_ref.set({"name": "Bench recipe", "average_rating": 0, "rating_count": 0})
+
+    print(f"{args.ratings} ratings from {args.threads} threads on {args.collection}/{BENCH_RECIPE}")
+    print(f"{'writer':>10} {'rps':>8} {'sent':>6} {'stored':>7} {'lost':>6} {'errors':>7}")
+
+    reset()
+    result = run("legacy", lambda rating: legacy_rating(recipe_ref, rating), args.threads, args.ratings)
+    stored = recipe_ref.get().to_dict().get("rating_count", 0)
+    print(f"{'legacy':>10} {result['rps']:>8} {result['sent']:>6} {stored:>7} {result['sent'] - result['errors'] - stored:>6} {result['errors']:>7}")
+
+    reset()
+    result = run("sharded", lambda rating: counters.add(BENCH_RECIPE, rating), args.threads, args.ratings)
+    counters.flush()
+    stored = recipe_ref.get().to_dict().get("rating_count", 0)
+    print(f"{'sharded':>10} {result['rps']:>8} {result['sent']:>6} {stored:>7} {result['sent'] - result['errors'] - stored:>6} {result['errors']:>7}")
+
+    reset()
+    buffered = RatingCounters(collection, args.shards, write_behind=True)
+    result = run("buffered", lambda rating: buffered.add(BENCH_RECIPE, rating), args.threads, args.ratings)
+    buffered.flush()
+    stored = recipe_ref.get().to_dict().get("rating_count", 0)
+    print(f"{'buffered':>10} {result['rps']:>8} {result['sent']:>6} {stored:>7} {result['sent'] - result['errors'] - stored:>6} {result['errors']:>7}")
+    print(f"buffered flush: {buffered.last_flush_ms} ms")
+
+    reset()
+
+
+if __name__ == "__main__":
+    main()
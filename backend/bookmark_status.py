@@ -0,0 +1,84 @@
+import os
+import threading
+from typing import Dict, List
+
+from cachetools import TTLCache
+
+from database import db
+
+# Statuses are kept per user for this long; another worker's writes show up after it
+BOOKMARK_CACHE_TTL = float(os.getenv("BOOKMARK_CACHE_TTL", "60"))
+BOOKMARK_CACHE_USERS = int(os.getenv("BOOKMARK_CACHE_USERS", "10000"))
+# Set to 0 to resolve every check against Firestore
+BOOKMARK_CACHE_ENABLED = os.getenv("BOOKMARK_CACHE_ENABLED", "1") != "0"
+
+
+def bookmarks_collection(uid: str):
+    return db.collection("users").document(uid).collection("bookmarks")
+
+
+class BookmarkStatus:
+    """Whether recipes are bookmarked by a user, resolved many at a time.
+
+    Unknown IDs are looked up with one get_all per call. Answers are
+    remembered per user, and bookmark_recipe / remove_bookmark keep them
+    current through set().
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._cache = TTLCache(maxsize=BOOKMARK_CACHE_USERS, ttl=BOOKMARK_CACHE_TTL)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, uid: str, recipe_ids: List[str]) -> Dict[str, bool]:
+        statuses = {}
+        if self.enabled:
+            with self._lock:
+                known = self._cache.get(uid, {})
+                statuses = {recipe_id: known[recipe_id] for recipe_id in recipe_ids if recipe_id in known}
+                self.hits += len(statuses)
+
+        unknown = [recipe_id for recipe_id in dict.fromkeys(recipe_ids) if recipe_id not in statuses]
+        if unknown:
+            collection = bookmarks_collection(uid)
+            # Existence is all we need, so no fields are sent back
+            found = {
+                doc.id
+                for doc in db.get_all([collection.document(recipe_id) for recipe_id in unknown], field_paths=[])
+                if doc.exists
+            }
+            resolved = {recipe_id: recipe_id in found for recipe_id in unknown}
+            if self.enabled:
+                with self._lock:
+                    self.misses += len(unknown)
+                    # A set() that landed during the read is newer than what the read saw
+                    resolved = {**resolved, **self._cache.get(uid, {})}
+                    self._cache[uid] = resolved
+            statuses.update({recipe_id: resolved[recipe_id] for recipe_id in unknown})
+        return statuses
+
+    def set(self, uid: str, recipe_id: str, bookmarked: bool) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # Recorded even for users with nothing cached, so a check already in flight cannot overwrite it
+            known = self._cache.get(uid)
+            if known is None:
+                known = self._cache[uid] = {}
+            known[recipe_id] = bookmarked
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "users": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+bookmark_status = BookmarkStatus(BOOKMARK_CACHE_ENABLED)
@@ -1,36 +1,143 @@
+import argparse
 import json
 import math
+import os
+import threading
+import time
 from collections import Counter
-from database import recipe_collection 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+from firebase_admin import firestore
 
+from database import db, recipe_collection
+from ingredient_frequencies import write_counters
+from ingredient_matching import normalize_recipe_ingredients
+from ingredients_weights import WEIGHTS_BINARY_FILE, WEIGHTS_FILE, write_weights_binary
 
-def generate_ingredient_weights():
-   
-    print("Starting ingredient scan")
-    ingredient_counts = Counter()
-    total_recipes = 0
+CHECKPOINT_FILE = WEIGHTS_FILE + ".checkpoint"
+# Ranges save their partial counts after this many recipes
+CHECKPOINT_EVERY = 2000
 
-   
-    for doc in recipe_collection.stream():
-        total_recipes += 1
-        data = doc.to_dict()
-        ingredients = data.get("ingredients", [])
-        for ingredient in set(ing.lower() for ing in ingredients):
-            ingredient_counts[ingredient] += 1
-    
-    print(f"Scanned {total_recipes} recipes and found {len(ingredient_counts)} unique ingredients.")
 
-    ingredient_weights = {}
+def _write_json(path: str, data) -> None:
+    # Readers only ever see a complete file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def plan_ranges(partitions: int) -> List[dict]:
+    """Split the recipes collection into document ID ranges of roughly equal size."""
+    bounds = [None]
+    # Firestore picks the split points; only the document IDs are kept so ranges survive a restart
+    for partition in db.collection_group("recipes").get_partitions(partitions):
+        if partition.end_at is not None:
+            bounds.append(partition.end_at.id)
+    bounds.append(None)
+    return [
+        {"start": start, "end": end, "last": None, "recipes": 0, "counts": {}, "done": False}
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+
+class WeightsRebuild:
+    """Parallel, resumable document-frequency scan over document ID ranges."""
+
+    def __init__(self, ranges: List[dict], checkpoint_path: str):
+        self.ranges = ranges
+        self.checkpoint_path = checkpoint_path
+        self._lock = threading.Lock()
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            _write_json(self.checkpoint_path, {"ranges": self.ranges})
+
+    def _query(self, scan: dict):
+        # Only the ingredients field is sent back, not steps, nutrition or images
+        query = recipe_collection.select(["ingredients"]).order_by(firestore.FieldPath.document_id())
+        if scan["last"] is not None:
+            query = query.start_after({firestore.FieldPath.document_id(): recipe_collection.document(scan["last"])})
+        elif scan["start"] is not None:
+            query = query.start_at({firestore.FieldPath.document_id(): recipe_collection.document(scan["start"])})
+        if scan["end"] is not None:
+            query = query.end_before({firestore.FieldPath.document_id(): recipe_collection.document(scan["end"])})
+        return query
+
+    def scan(self, scan: dict) -> None:
+        if scan["done"]:
+            return
+        counts = Counter(scan["counts"])
+        pending = 0
+        for doc in self._query(scan).stream():
+            all_ings, _ = normalize_recipe_ingredients(doc.to_dict().get("ingredients", []))
+            counts.update(set(all_ings))
+            pending += 1
+            if pending == CHECKPOINT_EVERY:
+                with self._lock:
+                    scan.update(counts=dict(counts), last=doc.id, recipes=scan["recipes"] + pending)
+                self.checkpoint()
+                pending = 0
+        with self._lock:
+            scan.update(counts=dict(counts), recipes=scan["recipes"] + pending, done=True)
+        self.checkpoint()
+
+    def run(self, workers: int) -> None:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() re-raises the first failed range; finished ranges stay checkpointed
+            list(executor.map(self.scan, self.ranges))
+
+    def totals(self) -> Tuple[Counter, int]:
+        counts = Counter()
+        for scan in self.ranges:
+            counts.update(scan["counts"])
+        return counts, sum(scan["recipes"] for scan in self.ranges)
+
+
+def generate_ingredient_weights(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rebuild ingredient IDF weights from the recipes collection.")
+    parser.add_argument("--partitions", type=int, default=8, help="Document ID ranges to scan (default 8)")
+    parser.add_argument("--workers", type=int, default=None, help="Ranges scanned at once (default: all)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--no-counters", action="store_true", help="Leave the live Firestore counters alone")
+    args = parser.parse_args(argv)
+
+    ranges = None
+    if not args.fresh and os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE, "r") as f:
+            ranges = json.load(f)["ranges"]
+        done = sum(scan["done"] for scan in ranges)
+        print(f"Resuming from checkpoint: {done}/{len(ranges)} ranges already scanned")
+    if ranges is None:
+        ranges = plan_ranges(args.partitions)
+
+    print(f"Starting ingredient scan over {len(ranges)} document ID ranges")
+    start = time.perf_counter()
+    rebuild = WeightsRebuild(ranges, CHECKPOINT_FILE)
+    rebuild.run(args.workers or len(ranges))
+    ingredient_counts, total_recipes = rebuild.totals()
+    seconds = time.perf_counter() - start
+
+    print(
+        f"Scanned {total_recipes} recipes in {seconds:.1f}s and found "
+        f"{len(ingredient_counts)} unique ingredients."
+    )
+
+    ingredient_weights: Dict[str, float] = {}
     for ingredient, count in ingredient_counts.items():
         idf_score = math.log(total_recipes / count)
         ingredient_weights[ingredient] = idf_score
 
-   
-    with open("ingredient_weights.json", "w") as f:
-        json.dump(ingredient_weights, f, indent=2)
+    _write_json(WEIGHTS_FILE, ingredient_weights)
+    write_weights_binary(ingredient_weights, WEIGHTS_BINARY_FILE)
+    # Running servers pick both files up on their next reload check
+    print(f"Successfully saved weights to {WEIGHTS_FILE} and {WEIGHTS_BINARY_FILE}")
 
-    print("Successfully saved weights to ingredient_weights.json")
+    if not args.no_counters:
+        write_counters(ingredient_counts, total_recipes)
+        print("Live IDF counters updated")
+    os.remove(CHECKPOINT_FILE)
 
 if __name__ == "__main__":
-    generate_ingredient_weights()
\ No newline at end of file
+    generate_ingredient_weights()
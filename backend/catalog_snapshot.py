@@ -0,0 +1,105 @@
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from ingredient_matching import lemmatize_many, normalize_recipe_ingredients
+from match_table import MatchTable, get_match_table
+from metadata_store import MetadataStore
+from scoring_engine import ScoringEngine
+from search_index import SearchIndex
+
+
+class CatalogSnapshot:
+    """Read-only view of the recipes collection at one catalog version."""
+
+    def __init__(self, version: int, recipes: Dict[str, dict], table: Optional[MatchTable] = None):
+        self.version = version
+        self.recipes = recipes
+        # None means the shared table, resolved only when a request first matches terms
+        self._table = table
+        self._derived: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def derive(self, name: Hashable, builder: Callable[["CatalogSnapshot"], Any]) -> Any:
+        # Derived structures are built once per snapshot and shared by every request
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self)
+            return self._derived[name]
+
+    def patch_live(self, recipes: Dict[str, dict]) -> None:
+        """Swap in documents whose only changes are live counters (ratings, feedback).
+
+        Only the recipe dicts and the metadata rating column read those fields, so
+        the version and everything else derived from it stay as they are.
+        """
+        with self._lock:
+            self.recipes.update(recipes)
+            metadata = self._derived.get("metadata")
+            if metadata is not None:
+                recipe_ids = self.recipe_ids()
+                metadata.update_ratings({
+                    bisect_left(recipe_ids, recipe_id): data.get("average_rating")
+                    for recipe_id, data in recipes.items()
+                })
+
+    def recipe_ids(self) -> List[str]:
+        """Row order shared by the columnar structures: document ID order, as Firestore streams it."""
+        return self.derive("recipe_ids", lambda snapshot: sorted(snapshot.recipes))
+
+    def metadata(self) -> MetadataStore:
+        return self.derive("metadata", lambda snapshot: MetadataStore(snapshot.recipe_ids(), snapshot.recipes))
+
+    def ingredients(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        """recipe id -> (all, main) normalized ingredient names."""
+        return self.derive("ingredients", _build_ingredients)
+
+    def vocabulary(self) -> List[str]:
+        return self.derive("vocabulary", _build_vocabulary)
+
+    def search_index(self) -> SearchIndex:
+        return self.derive(
+            "search_index",
+            lambda snapshot: SearchIndex(snapshot.recipe_ids(), snapshot.recipes, snapshot.ingredients()),
+        )
+
+    def lemmas(self) -> Dict[str, str]:
+        """Lemma of every vocabulary entry, computed once per catalog version."""
+        return self.derive("lemmas", lambda snapshot: lemmatize_many(snapshot.vocabulary()))
+
+    def match_table(self) -> MatchTable:
+        """The match table, synced to this version's vocabulary."""
+        return self.derive("match_table", lambda snapshot: snapshot.table.sync(snapshot.lemmas()))
+
+    @property
+    def table(self) -> MatchTable:
+        return self._table if self._table is not None else get_match_table()
+
+    def scoring_engine(self, weights: Mapping[str, float]) -> ScoringEngine:
+        # Live IDF weights carry a version; the engine is rebuilt when they move on
+        weights_version = getattr(weights, "version", None)
+        with self._lock:
+            cached = self._derived.get("scoring_engine")
+            if cached is None or cached[0] != weights_version:
+                cached = (weights_version, ScoringEngine(self.recipe_ids(), self.ingredients(), weights))
+                self._derived["scoring_engine"] = cached
+            return cached[1]
+
+
+def _build_ingredients(snapshot: CatalogSnapshot) -> Dict[str, Tuple[List[str], List[str]]]:
+    ingredients = {}
+    for recipe_id, data in snapshot.recipes.items():
+        all_ings, main_ings = normalize_recipe_ingredients(data.get("ingredients", []))
+        if all_ings:
+            ingredients[recipe_id] = (all_ings, main_ings)
+    return ingredients
+
+
+def _build_vocabulary(snapshot: CatalogSnapshot) -> List[str]:
+    vocabulary = set()
+    for all_ings, _ in snapshot.ingredients().values():
+        vocabulary.update(all_ings)
+    return sorted(vocabulary)
@@ -0,0 +1,37 @@
+from collections import Counter
+
+from database import db, recipe_collection
+
+BATCH_SIZE = 500
+
+
+def recount_feedback_counts() -> dict:
+    """Set every recipe's feedback_count from its feedbacks subcollection.
+
+    Submitting feedback keeps the count current with increments; this is for
+    recipes whose feedback predates the counter.
+    """
+    counts = Counter(
+        doc.reference.parent.parent.id
+        for doc in db.collection_group("feedbacks").select([]).stream()
+    )
+
+    batch, pending, updated = db.batch(), 0, 0
+    for doc in recipe_collection.select(["feedback_count"]).stream():
+        count = counts.get(doc.id, 0)
+        if doc.to_dict().get("feedback_count") == count:
+            continue
+        batch.update(doc.reference, {"feedback_count": count})
+        pending += 1
+        updated += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+    return {"feedbacks": sum(counts.values()), "recipes_updated": updated}
+
+
+if __name__ == "__main__":
+    # Usage: python feedback_counts.py  (backfill feedback_count on every recipe)
+    print(recount_feedback_counts())
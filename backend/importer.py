@@ -1,7 +1,15 @@
+import argparse
+import hashlib
+import json
 import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, firestore
+from ingredient_frequencies import rebuild_counters
+from models.recipe_model import LIVE_FIELDS
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +27,9 @@ if not firebase_admin._apps:
 db = firestore.client()
 recipe_collection = db.collection("recipes")
 
+# Retries per write before the import reports it as failed
+MAX_ATTEMPTS = int(os.getenv("IMPORT_MAX_ATTEMPTS", "5"))
+
 # Recipes to import 
 recipes_to_import = [
     {
@@ -682,29 +693,176 @@ recipes_to_import = [
     }
 ]
 
-def main():
-    if not recipes_to_import:
-        print("No recipes to import. Add recipes to the 'recipes_to_import' list.")
+def recipe_id(recipe: dict) -> str:
+    """Stable document ID: a hash of the recipe's identity, so re-imports hit the same document."""
+    key = f"{recipe.get('name', '').strip().lower()}|{(recipe.get('cuisine') or '').strip().lower()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def content_hash(recipe: dict) -> str:
+    """Hash of the recipe body; a matching stored hash means the document is unchanged."""
+    body = {k: v for k, v in recipe.items() if k != "content_hash"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_recipes(path: str) -> List[dict]:
+    """Recipes from a JSON list or an NDJSON file (one recipe per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data["recipes"] if isinstance(data, dict) else data
+
+
+def dedupe(recipes: Iterable[dict]) -> Dict[str, dict]:
+    """document ID -> recipe; the first of several recipes with the same identity wins."""
+    unique = {}
+    for recipe in recipes:
+        doc_id = recipe_id(recipe)
+        if doc_id in unique:
+            print(f"Skipping duplicate recipe: {recipe.get('name')} ({recipe.get('cuisine')})")
+            continue
+        unique[doc_id] = recipe
+    return unique
+
+
+def plan_import(recipes: Dict[str, dict], prune_legacy: bool) -> dict:
+    """Writes and deletes needed to bring Firestore in line with the recipes, and what can be skipped.
+
+    Stored recipes are matched to the source by identity (name and cuisine), not by
+    document ID. A recipe left by the old add()-based import under a random ID is
+    therefore rewritten in place, keeping its ratings, feedback and bookmarks,
+    instead of being imported a second time. Of several copies, the one with the
+    most ratings and feedback is kept; the others are reported as duplicates and
+    only deleted with prune_legacy.
+    """
+    writes, unchanged, deletes, duplicates = {}, 0, [], []
+    stored = {}
+    # Only the fields needed to diff and match are read back, not whole recipes
+    for doc in recipe_collection.select(["content_hash", "user_id", "name", "cuisine", *LIVE_FIELDS]).stream():
+        stored[doc.id] = doc.to_dict()
+
+    # identity -> stored copies, best first: the most rated and commented on, since its
+    # feedback and bookmarks live under its ID; then the hash ID, imported docs, the oldest legacy ID
+    copies = defaultdict(list)
+    for doc_id, data in stored.items():
+        if not data.get("user_id"):
+            # User-created recipes are never touched by the importer
+            copies[recipe_id(data)].append(doc_id)
+    for key, doc_ids in copies.items():
+        doc_ids.sort(key=lambda doc_id: (
+            -(stored[doc_id].get("rating_count", 0) + stored[doc_id].get("feedback_count", 0)),
+            doc_id != key,
+            not stored[doc_id].get("content_hash"),
+            doc_id,
+        ))
+
+    adopted = 0
+    for key, recipe in recipes.items():
+        doc_id, *extra = copies.get(key) or [key]
+        duplicates.extend(extra)
+        data = stored.get(doc_id, {})
+        if doc_id != key and not data.get("content_hash"):
+            adopted += 1
+
+        digest = content_hash(recipe)
+        if data.get("content_hash") == digest:
+            unchanged += 1
+        else:
+            # A re-import carries the runtime counters over instead of resetting them
+            live = {field: value for field, value in data.items() if field in LIVE_FIELDS}
+            writes[doc_id] = {**recipe, **live, "content_hash": digest}
+
+    for key, doc_ids in copies.items():
+        if key in recipes:
+            continue
+        for doc_id in doc_ids:
+            if stored[doc_id].get("content_hash") or prune_legacy:
+                deletes.append(doc_id)
+    if prune_legacy:
+        deletes.extend(duplicates)
+    return {"writes": writes, "unchanged": unchanged, "deletes": deletes, "duplicates": duplicates, "adopted": adopted}
+
+
+def apply_import(writes: Dict[str, dict], deletes: List[str]) -> dict:
+    """Send all writes and deletes through one BulkWriter, retrying failed operations."""
+    failed = []
+    written = 0
+
+    def on_result(reference, result, bulk_writer) -> None:
+        nonlocal written
+        written += 1
+
+    def on_error(error, bulk_writer) -> bool:
+        if error.attempts < MAX_ATTEMPTS:
+            return True
+        failed.append(f"{error.operation.reference.id}: {error.message}")
+        return False
+
+    start = time.perf_counter()
+    bulk_writer = db.bulk_writer()
+    bulk_writer.on_write_result(on_result)
+    bulk_writer.on_write_error(on_error)
+    for doc_id, recipe in writes.items():
+        bulk_writer.set(recipe_collection.document(doc_id), recipe)
+    for doc_id in deletes:
+        bulk_writer.delete(recipe_collection.document(doc_id))
+    bulk_writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "operations": written,
+        "failed": failed,
+        "seconds": round(seconds, 2),
+        "ops_per_second": round(written / seconds, 1) if seconds else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Upsert recipes into Firestore.")
+    parser.add_argument("file", nargs="?", help="JSON or NDJSON recipes file (default: recipes_to_import)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+    parser.add_argument(
+        "--prune-legacy",
+        action="store_true",
+        help="Also delete legacy recipes no longer in the source, and duplicate copies of imported ones",
+    )
+    args = parser.parse_args(argv)
+
+    source = load_recipes(args.file) if args.file else recipes_to_import
+    if not source:
+        print("No recipes to import. Add recipes to the 'recipes_to_import' list or pass a file.")
         return
 
     print("--- Starting Recipe Import to Firestore ---")
+    recipes = dedupe(source)
+    plan = plan_import(recipes, args.prune_legacy)
+    print(
+        f"{len(recipes)} recipes: {len(plan['writes'])} new or changed, "
+        f"{plan['unchanged']} unchanged, {len(plan['deletes'])} to delete, "
+        f"{plan['adopted']} legacy documents adopted in place."
+    )
+    if plan["duplicates"] and not args.prune_legacy:
+        print(f"{len(plan['duplicates'])} duplicate copies left in place; --prune-legacy deletes them.")
+    if args.dry_run:
+        print("Dry run: nothing written.")
+        return
+    if not plan["writes"] and not plan["deletes"]:
+        print("Firestore is already up to date.")
+        return
 
-    # Optional: clear existing recipes
-    print("Clearing existing recipes (if any)...")
-    existing_docs = recipe_collection.stream()
-    for doc in existing_docs:
-        doc.reference.delete()
-    print("Existing recipes cleared.")
-
-    print(f"Inserting {len(recipes_to_import)} recipes...")
-    for recipe in recipes_to_import:
-        recipe_collection.add(recipe)
+    report = apply_import(plan["writes"], plan["deletes"])
+    print(
+        f"Committed {report['operations']} operations in {report['seconds']}s "
+        f"({report['ops_per_second']} ops/s)."
+    )
+    for failure in report["failed"]:
+        print(f"Failed after {MAX_ATTEMPTS} attempts: {failure}")
 
-    print(f"Successfully inserted {len(recipes_to_import)} recipes into Firestore.")
+    # Bulk writes bypass the per-recipe counter updates, so recount once at the end
+    counters = rebuild_counters()
+    print(f"Rebuilt IDF counters: {counters['ingredients']} ingredients over {counters['recipes']} recipes.")
     print("--- Recipe Import Complete ---")
 
 if __name__ == "__main__":
     main()
-
-
-
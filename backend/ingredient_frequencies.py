@@ -0,0 +1,115 @@
+import hashlib
+from collections import Counter
+from typing import Dict, Optional
+
+from firebase_admin import firestore
+
+from database import db, recipe_collection
+from ingredient_matching import normalize_recipe_ingredients
+from ingredients_weights import INGREDIENT_WEIGHTS, IdfWeights
+
+# One counter document per ingredient, plus the recipe count
+frequency_collection = db.collection("ingredient_frequencies")
+TOTALS_DOC = "totals"
+BATCH_SIZE = 500
+
+
+def frequency_ref(name: str):
+    # Ingredient names may contain "/" and other characters document IDs cannot
+    return frequency_collection.document(hashlib.sha1(name.encode("utf-8")).hexdigest())
+
+
+def frequency_deltas(old_ingredients: Optional[list], new_ingredients: Optional[list]) -> Dict[str, int]:
+    """Document-frequency change per ingredient when a recipe's ingredients go from old to new."""
+    old = set(normalize_recipe_ingredients(old_ingredients or [])[0])
+    new = set(normalize_recipe_ingredients(new_ingredients or [])[0])
+    deltas = {name: 1 for name in new - old}
+    deltas.update({name: -1 for name in old - new})
+    return deltas
+
+
+def write_deltas(writer, deltas: Dict[str, int], recipe_delta: int = 0) -> None:
+    """Queue counter increments on a transaction or batch, next to the recipe write they belong to.
+
+    Increments need no reads, so concurrent writers never contend on a counter document.
+    """
+    for name, delta in deltas.items():
+        if delta:
+            writer.set(frequency_ref(name), {"name": name, "count": firestore.Increment(delta)}, merge=True)
+    if recipe_delta:
+        writer.set(frequency_collection.document(TOTALS_DOC), {"recipe_count": firestore.Increment(recipe_delta)}, merge=True)
+
+
+def write_counters(counts: Dict[str, int], recipe_count: int) -> None:
+    """Overwrite every counter with full recounts, in batches of BATCH_SIZE."""
+    writes = {frequency_ref(name).id: {"name": name, "count": count} for name, count in counts.items()}
+    # Live weights only switch to the counters once a full recount has seeded them
+    writes[TOTALS_DOC] = {"recipe_count": recipe_count, "seeded": True}
+    # Counters of ingredients no recipe uses any more are dropped
+    stale = [doc.id for doc in frequency_collection.select([]).stream() if doc.id not in writes]
+
+    batch, pending = db.batch(), 0
+    for doc_id in list(writes) + stale:
+        ref = frequency_collection.document(doc_id)
+        if doc_id in writes:
+            batch.set(ref, writes[doc_id])
+        else:
+            batch.delete(ref)
+        pending += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+
+
+def rebuild_counters() -> Dict[str, int]:
+    """Recount every counter from the recipes collection, e.g. after a bulk import."""
+    counts = Counter()
+    recipe_count = 0
+    for doc in recipe_collection.select(["ingredients"]).stream():
+        recipe_count += 1
+        counts.update(set(normalize_recipe_ingredients(doc.to_dict().get("ingredients", []))[0]))
+    write_counters(counts, recipe_count)
+    return {"recipes": recipe_count, "ingredients": len(counts)}
+
+
+class FrequencyListener:
+    """Feeds counter changes from Firestore into the live IDF weights."""
+
+    def __init__(self, collection, weights: IdfWeights):
+        self.collection = collection
+        self.weights = weights
+        self._watch = None
+
+    def start(self) -> None:
+        self._watch = self.collection.on_snapshot(self._on_snapshot)
+
+    def stop(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time) -> None:
+        counts = {}
+        recipe_count = None
+        seeded = None
+        for change in changes:
+            # Removed changes still carry the document's last data
+            data = change.document.to_dict() or {}
+            removed = change.type.name == "REMOVED"
+            if change.document.id == TOTALS_DOC:
+                recipe_count = 0 if removed else data.get("recipe_count", 0)
+                seeded = not removed and bool(data.get("seeded"))
+            elif data.get("name"):
+                counts[data["name"]] = 0 if removed else data.get("count", 0)
+        if counts or recipe_count is not None:
+            self.weights.apply(counts, recipe_count, seeded)
+
+
+frequency_listener = FrequencyListener(frequency_collection, INGREDIENT_WEIGHTS)
+
+
+if __name__ == "__main__":
+    # Usage: python ingredient_frequencies.py  (recount every counter from the recipes)
+    print(rebuild_counters())
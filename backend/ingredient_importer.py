@@ -1,4 +1,7 @@
+import argparse
 import os
+from collections import defaultdict
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -93,20 +96,79 @@ ingredient_data = [
     }
 ]
 
-def main():
+def duplicate_items(categories: List[dict]) -> Dict[str, List[str]]:
+    """item -> categories, for items listed under more than one category."""
+    seen = defaultdict(list)
+    for category in categories:
+        for item in category["items"]:
+            seen[item.strip().lower()].append(category["category"])
+    return {item: names for item, names in seen.items() if len(names) > 1}
+
+
+def plan_sync(collection_ref, categories: List[dict]) -> dict:
+    """Category writes and deletes needed to match the stored collection to categories."""
+    wanted = {category["category"]: category for category in categories}
+    writes, deletes, changes = {}, [], []
+
+    stored = {}
+    for doc in collection_ref.stream():
+        data = doc.to_dict()
+        name = data.get("category")
+        if name not in wanted:
+            deletes.append(doc.reference)
+            changes.append(f"- {name}")
+            continue
+        if name in stored:
+            # Left over from an interrupted run of the old wipe-and-insert import
+            deletes.append(doc.reference)
+            changes.append(f"- {name} (duplicate document {doc.id})")
+            continue
+        stored[name] = (doc.reference, data)
+
+    for name, category in wanted.items():
+        if name not in stored:
+            writes[name] = (collection_ref.document(), category)
+            changes.append(f"+ {name} ({len(category['items'])} items)")
+            continue
+        ref, data = stored[name]
+        if data != category:
+            writes[name] = (ref, category)
+            old_items, new_items = set(data.get("items", [])), set(category["items"])
+            added = ", ".join(sorted(new_items - old_items)) or "-"
+            removed = ", ".join(sorted(old_items - new_items)) or "-"
+            changes.append(f"~ {name}: added {added}; removed {removed}")
+    return {"writes": writes, "deletes": deletes, "changes": changes}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sync ingredient categories to Firestore.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+    args = parser.parse_args(argv)
+
     collection_ref = db.collection("ingredient_categories")
 
-    print("Deleting existing ingredient categories...")
-    docs = collection_ref.stream()
-    for doc in docs:
-        doc.reference.delete()
+    for item, names in sorted(duplicate_items(ingredient_data).items()):
+        print(f"Warning: '{item}' is listed in {len(names)} categories: {', '.join(names)}")
+
+    plan = plan_sync(collection_ref, ingredient_data)
+    if not plan["changes"]:
+        print("Ingredient categories are already up to date.")
+        return
+    for change in plan["changes"]:
+        print(change)
+    if args.dry_run:
+        print("Dry run: nothing written.")
+        return
 
-    print("Inserting new categories...")
-    for category in ingredient_data:
-        collection_ref.add(category)
-        print(f"Added category: {category['category']}")
+    # One atomic commit, so /ingredients never serves a half-synced list
+    batch = db.batch()
+    for ref, category in plan["writes"].values():
+        batch.set(ref, category)
+    for ref in plan["deletes"]:
+        batch.delete(ref)
+    batch.commit()
 
-    print(" All ingredient categories inserted successfully!")
+    print(f"Synced ingredient categories: {len(plan['writes'])} written, {len(plan['deletes'])} deleted.")
 
 if __name__ == "__main__":
     main()
@@ -1,23 +1,225 @@
+import os
+import threading
+import numpy as np
 import spacy
+from collections import OrderedDict
 from difflib import SequenceMatcher
+from rapidfuzz import fuzz, process
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Load spaCy English model once
 nlp = spacy.load("en_core_web_sm")
 
-def lemmatize_ingredient(ingredient: str) -> str:
-    
-    doc = nlp(ingredient.lower())
+# Lemmas only need the tagger chain; skip the parser and NER on every call
+LEMMA_PIPES = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer")
+LEMMA_DISABLED = [name for name in nlp.pipe_names if name not in LEMMA_PIPES]
+LEMMA_CACHE_SIZE = int(os.getenv("LEMMA_CACHE_SIZE", "50000"))
+
+# fuzz.ratio score (0-100) a pair must exceed to count as a fuzzy match
+FUZZY_SCORE_CUTOFF = float(os.getenv("FUZZY_SCORE_CUTOFF", "75"))
+# Threads used by process.cdist; -1 uses every core
+FUZZY_WORKERS = int(os.getenv("FUZZY_WORKERS", "-1"))
+# Distinct fuzz.ratio scores of ingredient-length strings differ by far more than this
+RATIO_EPSILON = 1e-3
+# Score cells per cdist call; inputs are matched in row chunks of about this size
+FUZZY_CHUNK_CELLS = int(os.getenv("FUZZY_CHUNK_CELLS", str(16 * 1024 * 1024)))
+
+
+class LemmaCache:
+    """Bounded LRU cache of lowercased ingredient -> lemma."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[str]:
+        with self._lock:
+            lemma = self._data.get(text)
+            if lemma is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(text)
+            self.hits += 1
+            return lemma
+
+    def put(self, text: str, lemma: str) -> None:
+        with self._lock:
+            self._data[text] = lemma
+            self._data.move_to_end(text)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+lemma_cache = LemmaCache(LEMMA_CACHE_SIZE)
+
+
+def _join_lemmas(doc) -> str:
     return " ".join(token.lemma_ for token in doc)
 
-def ingredients_match(input_ing: str, recipe_ing: str) -> bool:
-   
-    input_lem = lemmatize_ingredient(input_ing)
-    recipe_lem = lemmatize_ingredient(recipe_ing)
+
+def lemmatize_ingredient(ingredient: str) -> str:
+
+    text = ingredient.lower()
+    lemma = lemma_cache.get(text)
+    if lemma is None:
+        lemma = _join_lemmas(nlp(text, disable=LEMMA_DISABLED))
+        lemma_cache.put(text, lemma)
+    return lemma
+
+
+def lemmatize_many(ingredients: Iterable[str], batch_size: int = 256) -> Dict[str, str]:
+    """Lemmatize many ingredients in one nlp.pipe pass; keys are the lowercased inputs."""
+    lemmas = {}
+    missing = []
+    for text in {i.lower() for i in ingredients}:
+        lemma = lemma_cache.get(text)
+        if lemma is None:
+            missing.append(text)
+        else:
+            lemmas[text] = lemma
+
+    for text, doc in zip(missing, nlp.pipe(missing, disable=LEMMA_DISABLED, batch_size=batch_size)):
+        lemma = _join_lemmas(doc)
+        lemma_cache.put(text, lemma)
+        lemmas[text] = lemma
+    return lemmas
+
+
+def normalize_recipe_ingredients(ingredients: list) -> Tuple[List[str], List[str]]:
+    """Return (all, main) lowercased ingredient names for both stored ingredient formats."""
+    all_ings = []
+    main_ings = []
+    for i in ingredients:
+        if isinstance(i, dict):
+            name = i.get("name", "").strip().lower()
+            if not name:
+                continue
+            all_ings.append(name)
+            if i.get("is_main", False):
+                main_ings.append(name)
+        elif isinstance(i, str):
+            name = i.strip().lower()
+            all_ings.append(name)
+            main_ings.append(name)
+    return all_ings, main_ings
+
+
+def lemmas_match(input_lem: str, recipe_lem: str, score_cutoff: float = FUZZY_SCORE_CUTOFF) -> bool:
 
     # Check substring match for partial matching
     if input_lem in recipe_lem or recipe_lem in input_lem:
         return True
 
     # Calculate fuzzy similarity ratio
-    similarity = SequenceMatcher(None, input_lem, recipe_lem).ratio()
-    return similarity > 0.75
+    return fuzz.ratio(input_lem, recipe_lem) > score_cutoff
+
+
+def match_matrix(
+    input_lemmas: List[str],
+    choice_lemmas: List[str],
+    score_cutoff: float = FUZZY_SCORE_CUTOFF,
+    workers: int = FUZZY_WORKERS,
+) -> np.ndarray:
+    """Boolean [inputs x choices] matrix of lemmas_match decisions, scored in bulk with cdist.
+
+    Inputs are scored in row chunks into uint8 matrices, so peak memory stays
+    around two FUZZY_CHUNK_CELLS-byte matrices however large the vocabulary.
+    """
+    matches = np.zeros((len(input_lemmas), len(choice_lemmas)), dtype=bool)
+    if not input_lemmas or not choice_lemmas:
+        return matches
+
+    # cdist zeroes scores below the cutoff before rounding to uint8, so any
+    # nonzero cell is a match: a partial_ratio of exactly 100 (a substring in
+    # either direction), or a ratio strictly above score_cutoff
+    ratio_cutoff = score_cutoff + RATIO_EPSILON
+    chunk = max(1, FUZZY_CHUNK_CELLS // len(choice_lemmas))
+    for start in range(0, len(input_lemmas), chunk):
+        rows = input_lemmas[start:start + chunk]
+        matches[start:start + chunk] = process.cdist(
+            rows, choice_lemmas, scorer=fuzz.partial_ratio, score_cutoff=100, dtype=np.uint8, workers=workers
+        ) > 0
+        matches[start:start + chunk] |= process.cdist(
+            rows, choice_lemmas, scorer=fuzz.ratio, score_cutoff=ratio_cutoff, dtype=np.uint8, workers=workers
+        ) > 0
+
+    # The empty string is a substring of everything
+    matches[[not lem for lem in input_lemmas], :] = True
+    matches[:, [not lem for lem in choice_lemmas]] = True
+    return matches
+
+
+def match_rows(
+    input_lemmas: List[str],
+    choice_lemmas: List[str],
+    score_cutoff: float = FUZZY_SCORE_CUTOFF,
+    workers: int = FUZZY_WORKERS,
+) -> Iterator[np.ndarray]:
+    """Indices of the choices each input matches, one array per input.
+
+    Only one chunk of decisions exists at a time, for callers that would
+    otherwise hold a whole vocabulary x vocabulary bool matrix.
+    """
+    chunk = max(1, FUZZY_CHUNK_CELLS // max(1, len(choice_lemmas)))
+    for start in range(0, len(input_lemmas), chunk):
+        for row in match_matrix(input_lemmas[start:start + chunk], choice_lemmas, score_cutoff, workers):
+            yield row.nonzero()[0]
+
+
+def ingredients_match(input_ing: str, recipe_ing: str) -> bool:
+
+    return lemmas_match(lemmatize_ingredient(input_ing), lemmatize_ingredient(recipe_ing))
+
+
+def legacy_lemmas_match(input_lem: str, recipe_lem: str) -> bool:
+    """The SequenceMatcher > 0.75 rule lemmas_match replaced, kept for parity reports."""
+    if input_lem in recipe_lem or recipe_lem in input_lem:
+        return True
+    return SequenceMatcher(None, input_lem, recipe_lem).ratio() > 0.75
+
+
+def match_parity_report(
+    terms: List[str],
+    vocabulary: List[str],
+    score_cutoff: float = FUZZY_SCORE_CUTOFF,
+    max_examples: int = 20,
+) -> dict:
+    """Compare cdist match decisions with the legacy SequenceMatcher rule over terms x vocabulary."""
+    lemmas = lemmatize_many(list(terms) + list(vocabulary))
+    term_lemmas = [lemmas[t.lower()] for t in terms]
+    vocab_lemmas = [lemmas[v.lower()] for v in vocabulary]
+    new = match_matrix(term_lemmas, vocab_lemmas, score_cutoff=score_cutoff)
+
+    counts = {"both": 0, "neither": 0, "legacy_only": 0, "rapidfuzz_only": 0}
+    examples = {"legacy_only": [], "rapidfuzz_only": []}
+    for i, term in enumerate(terms):
+        for j, choice in enumerate(vocabulary):
+            old = legacy_lemmas_match(term_lemmas[i], vocab_lemmas[j])
+            if old == new[i, j]:
+                counts["both" if old else "neither"] += 1
+                continue
+            key = "legacy_only" if old else "rapidfuzz_only"
+            counts[key] += 1
+            if len(examples[key]) < max_examples:
+                examples[key].append((term, choice))
+
+    return {
+        "pairs": int(new.size),
+        "score_cutoff": score_cutoff,
+        "agreement": round((counts["both"] + counts["neither"]) / new.size, 4) if new.size else None,
+        "counts": counts,
+        "examples": examples,
+    }
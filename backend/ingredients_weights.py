@@ -1,12 +1,237 @@
+import hashlib
 import json
+import math
+import mmap
 import os
+import struct
+import threading
+import time
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
 
 # Path to the JSON file generated by calculate_weights.py
 WEIGHTS_FILE = os.path.join(os.path.dirname(__file__), "ingredient_weights.json")
+# Compact form of the same weights, preferred when present
+WEIGHTS_BINARY_FILE = os.path.join(os.path.dirname(__file__), "ingredient_weights.bin")
+# How often the files are checked for changes; 0 turns the watcher off
+WEIGHTS_RELOAD_INTERVAL = float(os.getenv("WEIGHTS_RELOAD_INTERVAL", "5"))
+
+# magic, written_at (ms), ingredient count, name blob length
+BINARY_MAGIC = b"RCWGT001"
+BINARY_HEADER = struct.Struct("<8sQQQ")
+
+
+def write_weights_binary(weights: Mapping, path: str = WEIGHTS_BINARY_FILE) -> None:
+    """Write weights as sorted UTF-8 names plus a float32 array indexed by ingredient ID.
+
+    Layout: header, int64 name offsets, name blob padded to 8 bytes, float32 weights.
+    """
+    names = sorted(weights)
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    blob = b"".join(encoded)
+    values = np.asarray([weights[name] for name in names], dtype=np.float32)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, time.time_ns() // 1_000_000, len(names), len(blob)))
+        f.write(offsets.tobytes())
+        f.write(blob + b"\0" * (-len(blob) % 8))
+        f.write(values.tobytes())
+    os.replace(tmp_path, path)
+
+
+class WeightsTable(Mapping):
+    """ingredient -> weight as loaded from one weights file."""
+
+    def __init__(self, ids: Dict[str, int], values, source: Optional[str], version: Optional[int], checksum: Optional[str]):
+        self._ids = ids
+        self._values = values
+        self.source = source
+        self.version = version
+        self.checksum = checksum
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._values[self._ids[name]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def _load_binary(path: str) -> WeightsTable:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, written_at, count, blob_len = BINARY_HEADER.unpack_from(mapped)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a weights file")
+
+    offsets = np.frombuffer(mapped, dtype=np.int64, count=count + 1, offset=BINARY_HEADER.size)
+    blob_start = BINARY_HEADER.size + offsets.nbytes
+    blob = mapped[blob_start:blob_start + blob_len]
+    # The weights stay in the mapping; only the name -> ID index lives on the heap
+    values = np.frombuffer(mapped, dtype=np.float32, count=count, offset=blob_start + blob_len + (-blob_len % 8))
+    ids = {blob[offsets[i]:offsets[i + 1]].decode("utf-8"): i for i in range(count)}
+    return WeightsTable(ids, values, path, written_at, hashlib.sha256(mapped).hexdigest()[:16])
+
+
+def _load_json(path: str) -> WeightsTable:
+    with open(path, "rb") as f:
+        raw = f.read()
+    weights = json.loads(raw)
+    names = list(weights)
+    return WeightsTable(
+        {name: i for i, name in enumerate(names)},
+        [weights[name] for name in names],
+        path,
+        os.stat(path).st_mtime_ns // 1_000_000,
+        hashlib.sha256(raw).hexdigest()[:16],
+    )
+
+
+def load_weights_table() -> WeightsTable:
+    if os.path.exists(WEIGHTS_BINARY_FILE):
+        try:
+            return _load_binary(WEIGHTS_BINARY_FILE)
+        except (ValueError, struct.error) as e:
+            print(f"{WEIGHTS_BINARY_FILE} is unreadable ({e}). Falling back to JSON.")
+    try:
+        return _load_json(WEIGHTS_FILE)
+    except FileNotFoundError:
+        print(" ingredient_weights.json not found. Using empty weights.")
+        return WeightsTable({}, [], None, None, None)
+
+
+def _file_signature() -> tuple:
+    signature = []
+    for path in (WEIGHTS_BINARY_FILE, WEIGHTS_FILE):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class IdfWeights(Mapping):
+    """ingredient -> IDF weight, log(recipe count / document frequency).
+
+    Weights are computed on read from live counters, so a counter update costs
+    O(changed ingredients) even though the recipe count moves every weight.
+    Until counters seeded by a full recount arrive, the weights file generated
+    offline is served; that file is reloaded when it changes on disk or on reload().
+    Unseeded counters only hold increments since deploy and would rank on a
+    handful of recipes.
+    """
+
+    def __init__(self):
+        self._table = load_weights_table()
+        self._signature = _file_signature()
+        self._counts: Dict[str, int] = {}
+        self.recipe_count = 0
+        # Set once write_counters has recounted every recipe into the counters
+        self.seeded = False
+        # Bumped on every change; derived structures rebuild when it moves
+        self.version = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[], None]] = []
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def live(self) -> bool:
+        """Whether weights come from the counters rather than the file."""
+        return self.seeded and self.recipe_count > 0
+
+    def __getitem__(self, name: str) -> float:
+        if not self.live:
+            return self._table[name]
+        # Counters drift under concurrent increments; keep the log argument >= 1
+        count = min(max(self._counts[name], 1), self.recipe_count)
+        return math.log(self.recipe_count / count)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._counts) if self.live else self._table)
+
+    def __len__(self) -> int:
+        return len(self._counts) if self.live else len(self._table)
+
+    def _changed(self) -> None:
+        self.version += 1
+        for callback in self._subscribers:
+            callback()
+
+    def apply(self, counts: Dict[str, int], recipe_count: Optional[int] = None, seeded: Optional[bool] = None) -> None:
+        """Take new document frequencies for the given ingredients, and the totals if they changed."""
+        was_live = self.live
+        with self._lock:
+            for name, count in counts.items():
+                if count > 0:
+                    self._counts[name] = count
+                else:
+                    self._counts.pop(name, None)
+            if recipe_count is not None:
+                self.recipe_count = recipe_count
+            if seeded is not None:
+                self.seeded = seeded
+        # Unseeded counter updates change no weight the server serves
+        if was_live or self.live:
+            self._changed()
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the weights file again if it changed on disk, or unconditionally with force."""
+        signature = _file_signature()
+        if not force and signature == self._signature:
+            return False
+        table = load_weights_table()
+        with self._lock:
+            self._table, self._signature = table, signature
+        print(f"Ingredient weights loaded from {table.source} (checksum {table.checksum})")
+        # While the live counters serve, the file changes no weight, so nothing needs rebuilding
+        if not self.live:
+            self._changed()
+        return True
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        self._subscribers.append(callback)
+
+    def start(self) -> None:
+        if WEIGHTS_RELOAD_INTERVAL > 0:
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(WEIGHTS_RELOAD_INTERVAL):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Could not reload ingredient weights: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "source": "counters" if self.live else self._table.source,
+            "file_active": not self.live,
+            "counters_seeded": self.seeded,
+            "file_version": self._table.version,
+            "file_checksum": self._table.checksum,
+            "recipe_count": self.recipe_count,
+            "ingredients": len(self),
+        }
+
+
+INGREDIENT_WEIGHTS = IdfWeights()
+
 
-try:
-    with open(WEIGHTS_FILE, "r") as f:
-        INGREDIENT_WEIGHTS = json.load(f)
-except FileNotFoundError:
-    print(" ingredient_weights.json not found. Using empty weights.")
-    INGREDIENT_WEIGHTS = {}
+if __name__ == "__main__":
+    # Usage: python ingredients_weights.py  (convert ingredient_weights.json to the binary format)
+    write_weights_binary(_load_json(WEIGHTS_FILE))
+    print(f"Wrote {WEIGHTS_BINARY_FILE}")
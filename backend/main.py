@@ -1,18 +1,48 @@
+import os
+import anyio.to_thread
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from database import recipe_collection
+from recipe_catalog import catalog
+from ingredient_frequencies import frequency_listener
+from ingredients_weights import INGREDIENT_WEIGHTS
+from match_table import get_match_table
+from scoring_pool import scoring_pool
+from rating_counters import rating_counters
+from utils.pagination import NEXT_CURSOR_HEADER
 from fastapi.middleware.cors import CORSMiddleware
 
 from routes import auth_routes, pantry_routes, recipe_routes, upload_routes, ingredients_routes, feedback_routes
 
+# Handlers doing blocking Firestore calls are plain defs and run on this pool
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Server starting up")
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    INGREDIENT_WEIGHTS.start()
+    frequency_listener.start()
+    catalog.start()
+    print(f"Recipe catalog loaded: {len(catalog.snapshot())} recipes ({catalog.role})")
+    catalog.snapshot().match_table()
+    print("Ingredient match table ready")
+    scoring_pool.start()
+    rating_counters.start()
     print("Text index ready")
     yield
+    # Buffered ratings are written before anything else winds down
+    rating_counters.stop()
+    catalog.stop()
+    frequency_listener.stop()
+    INGREDIENT_WEIGHTS.stop()
+    scoring_pool.stop()
+    try:
+        get_match_table().save()
+    except Exception as e:
+        print(f"Could not save the ingredient match table: {e}")
     print("Server shutting down ")
 
 app = FastAPI(lifespan=lifespan)
@@ -23,7 +53,9 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    # Paginated lists return their next cursor in a header
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth_routes.router)
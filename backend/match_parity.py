@@ -0,0 +1,31 @@
+import json
+import sys
+
+from database import recipe_collection
+from ingredient_matching import FUZZY_SCORE_CUTOFF, match_parity_report, normalize_recipe_ingredients
+
+
+def load_vocabulary() -> list:
+    vocabulary = set()
+    for doc in recipe_collection.select(["ingredients"]).stream():
+        all_ings, _ = normalize_recipe_ingredients(doc.to_dict().get("ingredients", []))
+        vocabulary.update(all_ings)
+    return sorted(vocabulary)
+
+
+def main():
+    # Usage: python match_parity.py [score_cutoff] [extra search terms...]
+    score_cutoff = float(sys.argv[1]) if len(sys.argv) > 1 else FUZZY_SCORE_CUTOFF
+    extra_terms = [t.strip().lower() for t in sys.argv[2:] if t.strip()]
+
+    print("Loading ingredient vocabulary")
+    vocabulary = load_vocabulary()
+    terms = sorted(set(vocabulary) | set(extra_terms))
+    print(f"Comparing {len(terms)} terms against {len(vocabulary)} ingredients at cutoff {score_cutoff:g}")
+
+    report = match_parity_report(terms, vocabulary, score_cutoff=score_cutoff)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from ingredient_matching import FUZZY_SCORE_CUTOFF, lemmatize_many, match_matrix, match_rows
+from ngram_index import NgramIndex
+
+# Stored next to ingredient_weights.json so both survive restarts together
+MATCH_TABLE_FILE = os.path.join(os.path.dirname(__file__), "ingredient_match_table.json")
+MATCH_TABLE_MAX_TERMS = int(os.getenv("MATCH_TABLE_MAX_TERMS", "100000"))
+# Stored decisions are only valid for the matcher that produced them
+MATCHER = f"rapidfuzz-ratio>{FUZZY_SCORE_CUTOFF:g}"
+
+
+class MatchTable:
+    """Ingredient term -> canonical catalog ingredients it matches.
+
+    With no path the table lives in memory only, as in scoring pool workers.
+    With persist off it still loads the file but never writes it, as in
+    catalog followers that leave the file to the leader.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.persist = True
+        self._vocabulary: Dict[str, str] = {}
+        self._terms: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        # Trigram index over vocabulary lemmas, for terms the table has never seen
+        self._index = NgramIndex()
+        self._by_lemma: Dict[str, Set[str]] = defaultdict(set)
+        # Lemmas shorter than an n-gram share none with the strings they are a substring of
+        self._short: Set[str] = set()
+        self._load()
+        for c, c_lemma in self._vocabulary.items():
+            self._by_lemma[c_lemma].add(c)
+        self._index.add(self._by_lemma)
+        self._short.update(c_lemma for c_lemma in self._by_lemma if len(c_lemma) < self._index.n)
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            print(f"{self.path} is corrupt. Rebuilding the match table.")
+            return
+        if data.get("matcher") != MATCHER:
+            print(f"{self.path} was built with a different matcher. Rebuilding the match table.")
+            return
+
+        self._vocabulary = data.get("vocabulary", {})
+        self._terms = {
+            term: {"lemma": entry["lemma"], "matches": set(entry["matches"])}
+            for term, entry in data.get("terms", {}).items()
+        }
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self.path is None or not self.persist:
+                return
+            payload = {
+                "matcher": MATCHER,
+                "vocabulary": self._vocabulary,
+                "terms": {
+                    term: {"lemma": entry["lemma"], "matches": sorted(entry["matches"])}
+                    for term, entry in self._terms.items()
+                },
+            }
+            # Per-process name: several workers may save at once
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _match_many(self, lemmas: List[str]) -> List[Set[str]]:
+        """Canonical matches for each lemma, scored against the whole vocabulary in one batch."""
+        names = list(self._vocabulary)
+        return [{names[j] for j in row} for row in match_rows(lemmas, list(self._vocabulary.values()))]
+
+    def _match_candidates(self, lemma: str) -> Set[str]:
+        """Fuzzy path for an unseen term: only lemmas sharing a trigram with it are rescored.
+
+        Short lemmas are the exception, on either side: a short term is scored against
+        the whole vocabulary, and short vocabulary lemmas are always candidates.
+        """
+        if len(lemma) < self._index.n:
+            candidates = list(self._by_lemma)
+        else:
+            candidates = [entry for entry, _ in self._index.query(lemma)]
+            candidates.extend(self._short.difference(candidates))
+        decisions = match_matrix([lemma], candidates)
+        return {c for c_lemma, hit in zip(candidates, decisions[0]) if hit for c in self._by_lemma[c_lemma]}
+
+    def _unindex(self, c: str) -> None:
+        c_lemma = self._vocabulary.get(c)
+        if c_lemma is None:
+            return
+        names = self._by_lemma[c_lemma]
+        names.discard(c)
+        if not names:
+            del self._by_lemma[c_lemma]
+            self._index.remove([c_lemma])
+            self._short.discard(c_lemma)
+
+    def _apply(self, added: Dict[str, str], removed: Set[str]) -> bool:
+        if not removed and not added:
+            return False
+
+        for c in removed:
+            self._unindex(c)
+            del self._vocabulary[c]
+        for c, c_lemma in added.items():
+            self._unindex(c)
+            self._vocabulary[c] = c_lemma
+            self._by_lemma[c_lemma].add(c)
+            self._index.add([c_lemma])
+            if len(c_lemma) < self._index.n:
+                self._short.add(c_lemma)
+
+        entries = list(self._terms.values())
+        added_names = list(added)
+        added_matches = match_rows([entry["lemma"] for entry in entries], list(added.values()))
+        for entry, row in zip(entries, added_matches):
+            entry["matches"] -= removed
+            entry["matches"].difference_update(added_names)
+            entry["matches"].update(added_names[j] for j in row)
+
+        # Every catalog ingredient is a known term as well
+        new_terms = [c for c in added if c not in self._terms or self._terms[c]["lemma"] != added[c]]
+        for c, matches in zip(new_terms, self._match_many([added[c] for c in new_terms])):
+            self._terms[c] = {"lemma": added[c], "matches": matches}
+        self._dirty = True
+        return True
+
+    def sync(self, vocabulary_lemmas: Dict[str, str]) -> "MatchTable":
+        """Bring the table in line with the catalog vocabulary, touching only changed entries."""
+        with self._lock:
+            removed = self._vocabulary.keys() - vocabulary_lemmas.keys()
+            added = {c: lem for c, lem in vocabulary_lemmas.items() if self._vocabulary.get(c) != lem}
+            changed = self._apply(added, removed)
+
+        if changed:
+            try:
+                self.save()
+            except Exception as e:
+                # The in-memory table is still good; the next save retries
+                print(f"Could not save the ingredient match table: {e}")
+        return self
+
+    def add_vocabulary(self, names: Iterable[str]) -> None:
+        """Register new ingredients right away instead of waiting for the catalog listener."""
+        names = [n for n in names if n not in self._vocabulary]
+        if not names:
+            return
+        lemmas = lemmatize_many(names)
+        with self._lock:
+            self._apply({n: lemmas[n.lower()] for n in names if n not in self._vocabulary}, set())
+
+    def lookup(self, terms: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+        """Canonical matches per term; only terms never seen before take the fuzzy path."""
+        result = {}
+        unseen = []
+        with self._lock:
+            for term in terms:
+                entry = self._terms.get(term)
+                if entry is None:
+                    unseen.append(term)
+                else:
+                    self.hits += 1
+                    result[term] = frozenset(entry["matches"])
+
+        if not unseen:
+            return result
+
+        lemmas = lemmatize_many(unseen)
+        with self._lock:
+            for term in unseen:
+                self.misses += 1
+                lemma = lemmas[term.lower()]
+                matches = self._match_candidates(lemma)
+                if len(self._terms) < MATCH_TABLE_MAX_TERMS:
+                    self._terms[term] = {"lemma": lemma, "matches": matches}
+                    self._dirty = True
+                result[term] = frozenset(matches)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "terms": len(self._terms),
+            "vocabulary": len(self._vocabulary),
+            "indexed_lemmas": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_shared: Optional[MatchTable] = None
+_shared_lock = threading.Lock()
+
+
+def get_match_table() -> MatchTable:
+    """The process's table over MATCH_TABLE_FILE, loaded on first use.
+
+    Scoring pool workers import this module through the snapshot classes but
+    never match terms, so they never read the file or build its index.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MatchTable(MATCH_TABLE_FILE)
+        return _shared
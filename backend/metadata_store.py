@@ -0,0 +1,102 @@
+import numpy as np
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.recipe_model import RecipeFilters
+
+
+def _has_value(value: Any) -> bool:
+    # Recipes without a value never fail the range filters, so they are left out
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and bool(value)
+
+
+def _sorted_column(recipes: List[dict], field: str) -> Tuple[np.ndarray, np.ndarray]:
+    pairs = [(data[field], row) for row, data in enumerate(recipes) if _has_value(data.get(field))]
+    pairs.sort()
+    values = np.asarray([value for value, _ in pairs], dtype=np.float64)
+    rows = np.asarray([row for _, row in pairs], dtype=np.int64)
+    return values, rows
+
+
+class MetadataStore:
+    """Columnar recipe metadata: bitmaps per dietary tag and difficulty, sorted time and rating columns.
+
+    Rows follow the snapshot's recipe_ids order so masks line up with the scoring engine.
+    """
+
+    def __init__(self, recipe_ids: List[str], recipes: Dict[str, dict]):
+        self.recipe_ids = recipe_ids
+        rows = [recipes[recipe_id] for recipe_id in recipe_ids]
+        size = len(rows)
+
+        dietary = defaultdict(lambda: np.zeros(size, dtype=bool))
+        difficulty = defaultdict(lambda: np.zeros(size, dtype=bool))
+        for row, data in enumerate(rows):
+            for tag in data.get("dietary_restrictions") or []:
+                dietary[tag.lower()][row] = True
+            difficulty[(data.get("difficulty") or "").lower()][row] = True
+        self.dietary = dict(dietary)
+        self.difficulty = dict(difficulty)
+
+        self.time_values, self.time_rows = _sorted_column(rows, "cooking_time_minutes")
+        # One tuple, so a reader never pairs values from one update with rows from another
+        self.rating_column = _sorted_column(rows, "average_rating")
+
+    @classmethod
+    def from_arrays(
+        cls,
+        recipe_ids: List[str],
+        dietary: Dict[str, np.ndarray],
+        difficulty: Dict[str, np.ndarray],
+        time_values: np.ndarray,
+        time_rows: np.ndarray,
+        rating_values: np.ndarray,
+        rating_rows: np.ndarray,
+    ) -> "MetadataStore":
+        """Store over prebuilt columns, e.g. views of a mapped snapshot file."""
+        store = cls.__new__(cls)
+        store.recipe_ids = recipe_ids
+        store.dietary = dietary
+        store.difficulty = difficulty
+        store.time_values, store.time_rows = time_values, time_rows
+        store.rating_column = (rating_values, rating_rows)
+        return store
+
+    @property
+    def rating_values(self) -> np.ndarray:
+        return self.rating_column[0]
+
+    @property
+    def rating_rows(self) -> np.ndarray:
+        return self.rating_column[1]
+
+    def update_ratings(self, ratings: Dict[int, Any]) -> None:
+        """Move rows to new average ratings without rebuilding the other columns."""
+        values, rows = self.rating_column
+        keep = ~np.isin(rows, list(ratings))
+        updated = sorted((value, row) for row, value in ratings.items() if _has_value(value))
+        values = np.concatenate([values[keep], np.asarray([value for value, _ in updated], dtype=np.float64)])
+        rows = np.concatenate([rows[keep], np.asarray([row for _, row in updated], dtype=np.int64)])
+        order = np.argsort(values, kind="stable")
+        self.rating_column = (values[order], rows[order])
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def mask(self, f: Optional[RecipeFilters]) -> np.ndarray:
+        """Bitmap of rows that pass the filters."""
+        mask = np.ones(len(self), dtype=bool)
+        if not f:
+            return mask
+
+        empty = np.zeros(len(self), dtype=bool)
+        for tag in f.dietary or []:
+            mask &= self.dietary.get(tag.lower(), empty)
+        if f.difficulty:
+            mask &= self.difficulty.get(f.difficulty.lower(), empty)
+        if f.max_time:
+            mask[self.time_rows[np.searchsorted(self.time_values, f.max_time, side="right"):]] = False
+        if f.min_rating:
+            rating_values, rating_rows = self.rating_column
+            mask[rating_rows[:np.searchsorted(rating_values, f.min_rating, side="left")]] = False
+        return mask
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 
 
 class RecipeBase(BaseModel):
@@ -23,9 +23,33 @@ class RecipeCreate(RecipeBase):
 class Recipe(RecipeBase):
     id: str      
     user_id: str
+    # Counted by POST /recipes/{id}/feedbacks; recipe writes never set it
+    feedback_count: int = 0
 
     model_config = ConfigDict(from_attributes=True) 
 
+class RecipeSummary(BaseModel):
+    """Card fields for list views; the full document comes from GET /recipes/{id}."""
+    id: str
+    name: str
+    cuisine: Optional[str] = None
+    image_url: Optional[str] = None
+    cooking_time_minutes: Optional[int] = None
+    difficulty: Optional[str] = None
+    dietary_restrictions: List[str] = []
+    average_rating: float = 0.0
+    rating_count: int = 0
+    feedback_count: int = 0
+    featured: Optional[bool] = False
+
+
+# Maintained by the app at runtime rather than by recipe authors
+LIVE_FIELDS = ["average_rating", "rating_count", "ratings_sharded", "feedback_count"]
+
+# Stored fields behind a summary, for Firestore select() projections
+SUMMARY_FIELDS = [field for field in RecipeSummary.model_fields if field != "id"]
+RecipeView = Literal["summary", "full"]
+
 class RecipeFilters(BaseModel):
     dietary: Optional[List[str]] = []
     max_time: Optional[int] = None
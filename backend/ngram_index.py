@@ -0,0 +1,52 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class NgramIndex:
+    """Character n-gram index over ingredient strings for typo-tolerant candidate lookup."""
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._grams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def __contains__(self, entry: str) -> bool:
+        return entry in self._grams
+
+    def ngrams(self, text: str) -> Set[str]:
+        # Padding lets short words and word edges produce grams of their own
+        padded = " " * (self.n - 1) + text + " "
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def add(self, entries: Iterable[str]) -> None:
+        for entry in entries:
+            if entry in self._grams:
+                continue
+            grams = self.ngrams(entry)
+            self._grams[entry] = grams
+            for gram in grams:
+                self._postings[gram].add(entry)
+
+    def remove(self, entries: Iterable[str]) -> None:
+        for entry in entries:
+            for gram in self._grams.pop(entry, ()):
+                postings = self._postings[gram]
+                postings.discard(entry)
+                if not postings:
+                    del self._postings[gram]
+
+    def query(self, text: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Entries sharing at least one n-gram with text, ranked by Dice similarity."""
+        grams = self.ngrams(text)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        ranked = sorted(
+            ((entry, 2 * count / (len(grams) + len(self._grams[entry]))) for entry, count in shared.items()),
+            key=lambda candidate: (-candidate[1], candidate[0]),
+        )
+        return ranked[:limit] if limit else ranked
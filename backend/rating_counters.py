@@ -0,0 +1,253 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from cachetools import TTLCache
+from firebase_admin import firestore
+
+from database import db, recipe_collection
+
+# More shards spread a hot recipe's ratings over more documents
+RATING_SHARDS = int(os.getenv("RATING_SHARDS", "10"))
+# How long a read of a recipe's rating totals is served from memory
+RATING_CACHE_TTL = float(os.getenv("RATING_CACHE_TTL", "5"))
+RATING_CACHE_SIZE = int(os.getenv("RATING_CACHE_SIZE", "10000"))
+# How often rated recipes get average_rating and rating_count rewritten
+RATING_AGGREGATE_INTERVAL = float(os.getenv("RATING_AGGREGATE_INTERVAL", "5"))
+# Set to acknowledge ratings from memory and write them in batches each interval
+RATING_WRITE_BEHIND = os.getenv("RATING_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+# Buffered ratings that trigger a flush before the interval is up
+RATING_FLUSH_SIZE = int(os.getenv("RATING_FLUSH_SIZE", "500"))
+# Firestore caps a batch at 500 writes
+BATCH_SIZE = 500
+
+SHARD_COLLECTION = "rating_shards"
+# Holds the totals written by the old read-modify-write ratings
+LEGACY_SHARD = "legacy"
+
+
+@firestore.transactional
+def _aggregate(transaction, recipe_ref, shards_ref) -> Optional[Tuple[float, int]]:
+    doc = recipe_ref.get(transaction=transaction)
+    if not doc.exists:
+        return None
+    data = doc.to_dict()
+
+    total, count = 0.0, 0
+    for shard in shards_ref.stream(transaction=transaction):
+        shard_data = shard.to_dict()
+        total += shard_data.get("sum", 0)
+        count += shard_data.get("count", 0)
+
+    update = {}
+    if not data.get("ratings_sharded"):
+        # First aggregation: carry the old average over as a shard of its own
+        legacy_count = data.get("rating_count", 0)
+        legacy_sum = data.get("average_rating", 0) * legacy_count
+        transaction.set(shards_ref.document(LEGACY_SHARD), {"sum": legacy_sum, "count": legacy_count})
+        total += legacy_sum
+        count += legacy_count
+        update["ratings_sharded"] = True
+
+    average = round(total / count, 1) if count else 0.0
+    if update or data.get("average_rating") != average or data.get("rating_count") != count:
+        transaction.update(recipe_ref, {**update, "average_rating": average, "rating_count": count})
+    return total, count
+
+
+class RatingCounters:
+    """Per-recipe rating sum and count, sharded so concurrent ratings never contend.
+
+    Writes are blind Increments on a random shard. The recipe document's
+    average_rating and rating_count are rewritten by a periodic aggregation,
+    at most once per interval per recipe, instead of on every rating.
+
+    In write-behind mode, add() only merges the rating into an in-memory
+    sum and count per recipe. flush() writes those in batches, one Increment
+    per recipe, so a burst on one recipe costs a single write per interval.
+    Buffered ratings are lost if the process dies without a graceful stop().
+    """
+
+    def __init__(self, collection, shards: int, write_behind: bool = False):
+        self.collection = collection
+        self.shards = shards
+        self.write_behind = write_behind
+        self._pending: Dict[str, List[float]] = {}
+        self._pending_ratings = 0
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._cache = TTLCache(maxsize=RATING_CACHE_SIZE, ttl=RATING_CACHE_TTL)
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ratings = 0
+        self.aggregations = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+
+    def _shards(self, recipe_id: str):
+        return self.collection.document(recipe_id).collection(SHARD_COLLECTION)
+
+    def _shard(self, recipe_id: str):
+        return self._shards(recipe_id).document(str(random.randrange(self.shards)))
+
+    def add(self, recipe_id: str, rating: int) -> None:
+        if not self.write_behind:
+            self._shard(recipe_id).set({"sum": firestore.Increment(rating), "count": firestore.Increment(1)}, merge=True)
+        with self._lock:
+            self.ratings += 1
+            if self.write_behind:
+                pending = self._pending.setdefault(recipe_id, [0, 0])
+                pending[0] += rating
+                pending[1] += 1
+                self._pending_ratings += 1
+                if self._pending_ratings >= RATING_FLUSH_SIZE:
+                    self._wake.set()
+            else:
+                self._dirty.add(recipe_id)
+            # Keep our own cached totals current so the rater sees their rating
+            cached = self._cache.get(recipe_id)
+            if cached is not None:
+                self._cache[recipe_id] = (cached[0] + rating, cached[1] + 1)
+
+    def pending(self, recipe_id: str) -> Tuple[float, int]:
+        """(sum, count) of a recipe's ratings buffered but not yet written."""
+        with self._lock:
+            total, count = self._pending.get(recipe_id, (0, 0))
+            return total, count
+
+    def totals(self, recipe_id: str) -> Optional[Tuple[float, int]]:
+        """(sum, count) of a recipe's ratings, or None if the recipe does not exist."""
+        with self._lock:
+            cached = self._cache.get(recipe_id)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+        doc = self.collection.document(recipe_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        total, count = 0.0, 0
+        for shard in self._shards(recipe_id).stream():
+            shard_data = shard.to_dict()
+            total += shard_data.get("sum", 0)
+            count += shard_data.get("count", 0)
+        if not data.get("ratings_sharded"):
+            # Not aggregated yet: the old totals still live on the recipe only
+            count += data.get("rating_count", 0)
+            total += data.get("average_rating", 0) * data.get("rating_count", 0)
+
+        with self._lock:
+            # Buffered ratings are part of the answer even before they are written
+            pending = self._pending.get(recipe_id)
+            if pending is not None:
+                total, count = total + pending[0], count + pending[1]
+            self._cache[recipe_id] = (total, count)
+        return total, count
+
+    def aggregate(self, recipe_id: str) -> Optional[Tuple[float, int]]:
+        recipe_ref = self.collection.document(recipe_id)
+        totals = _aggregate(db.transaction(), recipe_ref, self._shards(recipe_id))
+        with self._lock:
+            self.aggregations += 1
+        return totals
+
+    def _write_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_ratings = 0
+        items = list(pending.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            chunk = items[start:start + BATCH_SIZE]
+            batch = db.batch()
+            for recipe_id, (total, count) in chunk:
+                batch.set(self._shard(recipe_id), {"sum": firestore.Increment(total), "count": firestore.Increment(count)}, merge=True)
+            try:
+                batch.commit()
+            except Exception as e:
+                print(f"Could not write {len(chunk)} buffered ratings: {e}")
+                # Merge the chunk back so the next flush retries it
+                with self._lock:
+                    for recipe_id, (total, count) in chunk:
+                        merged = self._pending.setdefault(recipe_id, [0, 0])
+                        merged[0] += total
+                        merged[1] += count
+                        self._pending_ratings += count
+                continue
+            with self._lock:
+                self._dirty.update(recipe_id for recipe_id, _ in chunk)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            start = time.perf_counter()
+            if self.write_behind:
+                self._write_pending()
+            self._aggregate_dirty()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.flushes += 1
+                self.last_flush_ms = round(elapsed_ms, 1)
+                self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+    def _aggregate_dirty(self) -> None:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for recipe_id in dirty:
+            try:
+                self.aggregate(recipe_id)
+            except Exception as e:
+                print(f"Could not aggregate ratings for {recipe_id}: {e}")
+                with self._lock:
+                    self._dirty.add(recipe_id)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        # Writes whatever arrived after the thread's last pass
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            # Sleeps the interval, or less once enough ratings are buffered
+            self._wake.wait(RATING_AGGREGATE_INTERVAL)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Could not flush ratings: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "shards": self.shards,
+                "write_behind": self.write_behind,
+                "ratings": self.ratings,
+                "queued_ratings": self._pending_ratings,
+                "queued_recipes": len(self._pending),
+                "pending_aggregation": len(self._dirty),
+                "aggregations": self.aggregations,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "flushes": self.flushes,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+            }
+
+
+rating_counters = RatingCounters(recipe_collection, RATING_SHARDS, RATING_WRITE_BEHIND)
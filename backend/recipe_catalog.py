@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from catalog_snapshot import CatalogSnapshot
+from database import recipe_collection
+from ingredients_weights import INGREDIENT_WEIGHTS
+from match_table import get_match_table
+from models.recipe_model import LIVE_FIELDS
+from snapshot_file import MappedSnapshot, read_stamp, write_snapshot
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows: every process keeps its own catalog
+    fcntl = None
+
+# Set to share one memory-mapped catalog between uvicorn workers
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+# How often followers look for a newer file, and the leader's minimum gap between writes
+CATALOG_SNAPSHOT_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_INTERVAL", "1"))
+# Longest the shared file lags behind rating and feedback counters, which never mint a version
+CATALOG_LIVE_INTERVAL = float(os.getenv("CATALOG_LIVE_INTERVAL", "30"))
+# How long startup waits for the listener's first callback, or a follower for the leader's first file
+CATALOG_SNAPSHOT_WAIT = float(os.getenv("CATALOG_SNAPSHOT_WAIT", "60"))
+
+
+class RecipeCatalog:
+    """Process-wide copy of the recipes collection kept in sync by a snapshot listener.
+
+    With a snapshot path, the worker holding the file lock is the leader: it runs
+    the listener and publishes each version to the shared snapshot file. The other
+    workers map that file and swap to it whenever its version stamp changes.
+    """
+
+    def __init__(self, collection, snapshot_path: Optional[str] = None):
+        self.collection = collection
+        self.snapshot_path = snapshot_path if fcntl is not None else None
+        self.role = "standalone"
+        self._recipes: Dict[str, dict] = {}
+        self._snapshot = CatalogSnapshot(0, {})
+        self._lock = threading.Lock()
+        self._watch = None
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._dirty = threading.Event()
+        # Live counters patched since the last write; flushed on CATALOG_LIVE_INTERVAL
+        self._live_dirty = False
+        # Set by the listener's first callback, which carries the whole collection
+        self._loaded = threading.Event()
+        self.last_sync: Optional[float] = None
+        self.snapshot_writes = 0
+        self.snapshot_swaps = 0
+
+    def start(self) -> None:
+        if self.snapshot_path is None or self._acquire_leadership():
+            self._lead()
+            return
+
+        self.role = "follower"
+        # The leader alone writes the match table file
+        get_match_table().persist = False
+        deadline = time.time() + CATALOG_SNAPSHOT_WAIT
+        while not os.path.exists(self.snapshot_path) and time.time() < deadline:
+            time.sleep(0.5)
+        self._follow()
+        self._thread = threading.Thread(target=self._follow_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._dirty.set()
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _acquire_leadership(self) -> bool:
+        lock_file = open(self.snapshot_path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _lead(self) -> None:
+        if self.snapshot_path is not None:
+            self.role = "leader"
+        get_match_table().persist = True
+        self._loaded.clear()
+        self._watch = self.collection.on_snapshot(self._on_snapshot)
+        if not self._loaded.wait(CATALOG_SNAPSHOT_WAIT):
+            print(f"Recipe listener sent nothing in {CATALOG_SNAPSHOT_WAIT:g}s. Serving the previous catalog until it does.")
+        if self.role == "leader":
+            # Live weight changes are baked into the file too
+            INGREDIENT_WEIGHTS.subscribe(self._dirty.set)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, daemon=True)
+                self._thread.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            woken = self._dirty.wait(CATALOG_LIVE_INTERVAL)
+            if self._stopped.is_set():
+                return
+            if not woken and not self._live_dirty:
+                continue
+            self._dirty.clear()
+            self._live_dirty = False
+            try:
+                write_snapshot(self._snapshot, INGREDIENT_WEIGHTS, self.snapshot_path)
+                self.snapshot_writes += 1
+            except Exception as e:
+                print(f"Could not write catalog snapshot: {e}")
+            # A burst of listener changes collapses into one write per interval
+            self._stopped.wait(CATALOG_SNAPSHOT_INTERVAL)
+
+    def _follow(self) -> None:
+        try:
+            stamp = read_stamp(self.snapshot_path)
+        except FileNotFoundError:
+            return
+        current = self._snapshot
+        if not isinstance(current, MappedSnapshot) or current.file.stamp != stamp:
+            # Requests holding the old snapshot keep its mapping alive until they finish
+            mapped = MappedSnapshot(self.snapshot_path)
+            if isinstance(current, MappedSnapshot) and current.file.stamp[:2] == mapped.file.stamp[:2]:
+                # Same version rewritten with new live counters: what was built from the rest still holds
+                mapped.adopt_derived(current)
+            self._snapshot = mapped
+            self.snapshot_swaps += 1
+        # A follower is as fresh as the leader's last write, however often it polls
+        self.last_sync = self._snapshot.file.written_at
+
+    def _follow_loop(self) -> None:
+        while not self._stopped.wait(CATALOG_SNAPSHOT_INTERVAL):
+            if self._acquire_leadership():
+                print("Catalog snapshot leader is gone. Taking over the listener.")
+                self._thread = threading.current_thread()
+                self._lead()
+                self._write_loop()
+                return
+            try:
+                self._follow()
+            except Exception as e:
+                print(f"Could not map catalog snapshot: {e}")
+
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def _on_snapshot(self, col_snapshot, changes, read_time) -> None:
+        if not self._loaded.is_set():
+            # The first callback is the full collection; it replaces whatever we held,
+            # so nothing deleted before the listener started survives
+            recipes = {}
+            for doc in col_snapshot:
+                data = doc.to_dict()
+                data["id"] = doc.id
+                recipes[doc.id] = data
+            with self._lock:
+                self._recipes = recipes
+                self._publish()
+            self._loaded.set()
+            return
+
+        with self._lock:
+            changed = False
+            live = {}
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    changed |= self._recipes.pop(doc.id, None) is not None
+                    continue
+
+                data = doc.to_dict()
+                data["id"] = doc.id
+                previous = self._recipes.get(doc.id)
+                if previous == data:
+                    continue
+                self._recipes[doc.id] = data
+                if previous is not None and _changed_fields(previous, data) <= set(LIVE_FIELDS):
+                    # Rating aggregation and feedback counts land here on every write
+                    live[doc.id] = data
+                else:
+                    changed = True
+
+            if changed:
+                self._publish()
+            else:
+                if live:
+                    self._snapshot.patch_live(live)
+                    if self.role == "leader":
+                        self._live_dirty = True
+                self.last_sync = time.time()
+
+    def _publish(self) -> None:
+        # Millisecond stamps keep versions increasing across leader restarts,
+        # so no process mistakes a new catalog for one it has cached results for
+        version = max(self._snapshot.version + 1, time.time_ns() // 1_000_000)
+        self._snapshot = CatalogSnapshot(version, dict(self._recipes))
+        self.last_sync = time.time()
+        if self.role == "leader":
+            self._dirty.set()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._snapshot),
+            "version": self._snapshot.version,
+            "role": self.role,
+            "listening": self._watch is not None,
+            "last_sync": self.last_sync,
+            "staleness_seconds": round(time.time() - self.last_sync, 3) if self.last_sync else None,
+            "snapshot_writes": self.snapshot_writes,
+            "snapshot_swaps": self.snapshot_swaps,
+        }
+
+
+def _changed_fields(previous: dict, data: dict) -> set:
+    return {field for field in previous.keys() | data.keys() if previous.get(field) != data.get(field)}
+
+
+catalog = RecipeCatalog(recipe_collection, CATALOG_SNAPSHOT_PATH)
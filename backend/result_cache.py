@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+from cachetools import TTLCache
+from typing import Any, Hashable, List, Optional
+
+from models.recipe_model import RecipeFilters
+
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+
+
+def approx_size(obj: Any) -> int:
+    """Rough deep size in bytes of a JSON-like response."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(approx_size(v) for v in obj)
+    return size
+
+
+class _CountingTTLCache(TTLCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        # Called when an insert needs room
+        self.evictions += 1
+        return super().popitem()
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+class ResultCache:
+    """Bounded TTL cache of /generate-recipes responses.
+
+    Keys carry the catalog and weights versions, so a recipe write misses once the
+    listener has published it, in every worker alike; nothing is cleared by hand.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._cache = _CountingTTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=approx_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        version: Hashable,
+        ingredients: List[str],
+        filters: Optional[RecipeFilters],
+        limit: int,
+        offset: int,
+        view: str = "full",
+    ) -> Hashable:
+        filter_key = None
+        if filters:
+            filter_key = (
+                tuple(sorted({tag.lower() for tag in filters.dietary or []})),
+                filters.max_time or None,
+                (filters.difficulty or "").lower() or None,
+                filters.min_rating or None,
+            )
+            # Filters that restrict nothing share the unfiltered entry
+            if not any(filter_key):
+                filter_key = None
+        return version, tuple(sorted(set(ingredients))), filter_key, limit, offset, view
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # Larger than the whole cache
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._cache.expire()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "memory_bytes": self._cache.currsize,
+                "max_bytes": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self._cache.evictions,
+                "expirations": self._cache.expirations,
+            }
+
+
+result_cache = ResultCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL)
@@ -6,7 +6,7 @@ from utils.auth import get_current_user
 router = APIRouter()
 
 @router.get("/users/me", response_model=UserProfileResponse)
-async def get_user_profile(user: dict = Depends(get_current_user)):
+def get_user_profile(user: dict = Depends(get_current_user)):
     try:
         user_record = auth.get_user(user["uid"])
         return UserProfileResponse(
@@ -19,7 +19,7 @@ async def get_user_profile(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="User not found")
 
 @router.patch("/users/me", response_model=UserProfileResponse)
-async def edit_profile(profile_data: UserProfileUpdate, user: dict = Depends(get_current_user)):
+def edit_profile(profile_data: UserProfileUpdate, user: dict = Depends(get_current_user)):
     update_payload = profile_data.model_dump(exclude_unset=True)
     if not update_payload:
         raise HTTPException(status_code=400, detail="No update information provided.")
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from models.feedback_model import Feedback, FeedbackCreate
+from recipe_catalog import catalog
+from utils.pagination import NEXT_CURSOR_HEADER, newest_first, set_next_cursor
 
 from routes.auth_routes import get_current_user  
 
@@ -13,9 +16,6 @@ db = firestore.client()
 @router.post("/recipes/{recipe_id}/feedbacks", response_model=Feedback)
 def submit_feedback(recipe_id: str, feedback: FeedbackCreate, user: dict = Depends(get_current_user)):
     recipe_ref = db.collection("recipes").document(recipe_id)
-    recipe = recipe_ref.get()
-    if not recipe.exists:
-        raise HTTPException(status_code=404, detail="Recipe not found")
 
     feedback_data = {
         "user_id": user["uid"],
@@ -24,17 +24,30 @@ def submit_feedback(recipe_id: str, feedback: FeedbackCreate, user: dict = Depen
         "created_at": datetime.utcnow()
     }
 
-    recipe_ref.collection("feedbacks").add(feedback_data)
+    # One atomic commit: the count update fails on a missing recipe, and takes the feedback with it
+    batch = db.batch()
+    batch.create(recipe_ref.collection("feedbacks").document(), feedback_data)
+    batch.update(recipe_ref, {"feedback_count": firestore.Increment(1)})
+    try:
+        batch.commit()
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Recipe not found")
     return feedback_data
 
 
 @router.get("/recipes/{recipe_id}/feedbacks", response_model=List[Feedback])
-def get_feedbacks(recipe_id: str):
+def get_feedbacks(
+    recipe_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} header of the previous page"),
+):
     recipe_ref = db.collection("recipes").document(recipe_id)
-    recipe = recipe_ref.get()
-    if not recipe.exists:
+    docs = list(newest_first(recipe_ref.collection("feedbacks"), "created_at", limit, cursor).stream())
+
+    # Only an empty first page needs to tell a missing recipe from one nobody has reviewed
+    if not docs and cursor is None and recipe_id not in catalog.snapshot().recipes and not recipe_ref.get().exists:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    feedbacks_ref = recipe_ref.collection("feedbacks").order_by("created_at")
-    feedbacks = [doc.to_dict() for doc in feedbacks_ref.stream()]
-    return feedbacks
+    set_next_cursor(response, docs, "created_at", limit)
+    return [doc.to_dict() for doc in docs]
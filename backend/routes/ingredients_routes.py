@@ -6,7 +6,7 @@ db = firestore.client()
 INGREDIENT_COLLECTION = db.collection("ingredient_categories")
 
 @router.get("/ingredients")
-async def get_all_ingredients():
+def get_all_ingredients():
     
     try:
         docs = INGREDIENT_COLLECTION.stream() 
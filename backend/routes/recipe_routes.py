@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from models.recipe_model import Recipe, RecipeCreate, PantryRequest, RecipeBase, RecipeFilters
+from models.recipe_model import Recipe, RecipeCreate, PantryRequest, RecipeBase, RecipeFilters, RecipeSummary, RecipeView, SUMMARY_FIELDS
 from ingredients_weights import INGREDIENT_WEIGHTS
-from ingredient_matching import ingredients_match
-from rapidfuzz import fuzz
+from ingredient_frequencies import frequency_deltas, write_deltas
+from ingredient_matching import lemma_cache, normalize_recipe_ingredients
+from rating_counters import rating_counters
+from bookmark_status import bookmark_status
+from match_table import get_match_table
+from scoring_engine import score_pantry
+from scoring_pool import scoring_pool
+from search_index import SEARCHABLE_FIELDS
+from recipe_catalog import catalog
+from result_cache import result_cache
+from utils.pagination import NEXT_CURSOR_HEADER, newest_first, set_next_cursor
 from firebase_admin import firestore, credentials, auth
 from functools import lru_cache
 import json
@@ -23,18 +32,11 @@ if not firebase_admin._apps:
 db = firestore.client()
 RECIPE_COLLECTION = db.collection("recipes")
 
-try:
-    with open("ingredient_weights.json", "r") as f:
-        INGREDIENT_WEIGHTS = json.load(f)
-except FileNotFoundError:
-    print("Iingredient_weights.json not found. All ingredients will have a weight of 1.")
-    INGREDIENT_WEIGHTS = {}
-
 # Auth setup
 
 bearer_scheme = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
     
     token = credentials.credentials
     try:
@@ -68,166 +70,202 @@ class RatingService:
     
     def submit_rating(self, recipe_id: str, rating: int) -> dict:
         self.validate_rating(rating)
-        
-        doc_ref = self.collection.document(recipe_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
+
+        # The catalog answers existence for free; only unknown IDs cost a read
+        recipe = catalog.snapshot().recipes.get(recipe_id)
+        if recipe is None and not self.collection.document(recipe_id).get().exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Recipe not found"
             )
-        
-        recipe_data = doc.to_dict()
-        
-        current_total = recipe_data.get('average_rating', 0) * recipe_data.get('rating_count', 0)
-        new_count = recipe_data.get('rating_count', 0) + 1
-        new_average = (current_total + rating) / new_count
-        
-        doc_ref.update({
-            'average_rating': round(new_average, 1),
-            'rating_count': new_count
-        })
-        
+
+        rating_counters.add(recipe_id, rating)
+        if rating_counters.write_behind and recipe is not None:
+            # No Firestore round-trip per vote: the catalog's last aggregate plus what is still buffered
+            pending_total, pending_count = rating_counters.pending(recipe_id)
+            if not pending_count:
+                # A flush took the buffer between add() and here; still count this vote
+                pending_total, pending_count = rating, 1
+            new_count = recipe.get("rating_count", 0) + pending_count
+            new_total = recipe.get("average_rating", 0) * recipe.get("rating_count", 0) + pending_total
+        else:
+            new_total, new_count = rating_counters.totals(recipe_id) or (rating, 1)
+        new_average = new_total / new_count if new_count else 0.0
+
         return {
             "message": "Rating submitted successfully",
             "new_average": round(new_average, 1),
             "rating_count": new_count
         }
 
+    def get_recipe_rating(self, recipe_id: str) -> dict:
+        totals = rating_counters.totals(recipe_id)
+        if totals is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, 
+                detail="Recipe not found"
+            )
+        total, count = totals
+        return {
+            "recipe_id": recipe_id,
+            "average_rating": round(total / count, 1) if count else 0.0,
+            "rating_count": count
+        }
+
 
 rating_service = RatingService(db)
 
+
+def summarize(data: dict) -> dict:
+    """Trim a recipe document to the fields of a RecipeSummary."""
+    summary = {field: data[field] for field in SUMMARY_FIELDS if field in data}
+    summary["id"] = data.get("id")
+    return summary
+
+
+def _current(snapshot, recipe: dict, view: RecipeView) -> dict:
+    current = snapshot.recipes.get(recipe.get("id"), recipe)
+    return summarize(current) if view == "summary" else current
+
+
+# What a bookmark listing reads; older bookmarks also carry a full recipe_data copy it skips
+BOOKMARK_FIELDS = ["recipe_id", "recipe_name", "recipe_image", "bookmarked_at"]
+# Most IDs one batch bookmark check resolves
+MAX_BOOKMARK_CHECKS = 100
+
+
+# Recipe writes that change ingredients also move the IDF counters, in the same transaction
+
+@firestore.transactional
+def _update_recipe(transaction, doc_ref, update_data: dict) -> bool:
+    doc = doc_ref.get(transaction=transaction)
+    if not doc.exists:
+        return False
+    if "ingredients" in update_data:
+        old_ingredients = doc.to_dict().get("ingredients")
+        write_deltas(transaction, frequency_deltas(old_ingredients, update_data["ingredients"]))
+    transaction.update(doc_ref, update_data)
+    return True
+
+
+@firestore.transactional
+def _delete_recipe(transaction, doc_ref) -> None:
+    doc = doc_ref.get(transaction=transaction)
+    if not doc.exists:
+        return
+    write_deltas(transaction, frequency_deltas(doc.to_dict().get("ingredients"), None), recipe_delta=-1)
+    transaction.delete(doc_ref)
+
 # --- Public Endpoints ---
 
 #Generate Recipes based on Pantry Ingredients
 
 
 @router.post("/generate-recipes")
-async def generate_recipes(payload: PantryRequest):
+def generate_recipes(
+    payload: PantryRequest,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    view: RecipeView = Query("full", description="summary returns card fields only"),
+):
     
     if not payload.available_ingredients:
         raise HTTPException(status_code=400, detail="No ingredients provided.")
 
     # Normalize search ingredients
     search_ingredients = [i.strip().lower() for i in payload.available_ingredients if i.strip()]
-    recipes = []
-
-    for doc in RECIPE_COLLECTION.stream():
-        data = doc.to_dict()
-        data["id"] = doc.id
-
-        recipe_ingredients = data.get("ingredients", [])
-        if not recipe_ingredients:
-            continue
-
-        recipe_main_ings = []
-        recipe_all_ings = []
-
-        # Normalize ingredient formats 
-        for i in recipe_ingredients:
-            if isinstance(i, dict):
-                name = i.get("name", "").strip().lower()
-                if not name:
-                    continue
-                recipe_all_ings.append(name)
-                if i.get("is_main", False):
-                    recipe_main_ings.append(name)
-            elif isinstance(i, str):
-                name = i.strip().lower()
-                recipe_all_ings.append(name)
-                recipe_main_ings.append(name)
-
-        
-        if not any(ingredients_match(ing, r_ing) for ing in search_ingredients for r_ing in recipe_main_ings):
-            continue
-
-        total_weight = sum(INGREDIENT_WEIGHTS.get(ri, 1) for ri in recipe_all_ings)
-        match_score = 0
-        matched_ingredients = []
-
-        for ri in recipe_all_ings:
-            best_match_score = 0
-            best_match_ing = None
-
-            for si in search_ingredients:
-                # Use NLP matcher
-                if ingredients_match(si, ri):
-                   
-                    best_match_score = 1.0
-                    best_match_ing = si
-                    break  
-
-            if best_match_score > 0 and best_match_ing:
-                matched_ingredients.append(ri)
-                weight = INGREDIENT_WEIGHTS.get(ri, 1)
-                match_score += weight * best_match_score
-
-        # Normalize score
-        if total_weight > 0:
-            match_score /= total_weight
-
-        missing_ingredients = [ri for ri in recipe_all_ings if ri not in matched_ingredients]
-
-        # Apply filters if provided
-        f = payload.filters
-        if f:
-            if f.dietary and not all(tag.lower() in [d.lower() for d in data.get("dietary_restrictions", [])] for tag in f.dietary):
-                continue
-            if f.max_time and data.get("cooking_time_minutes") and data["cooking_time_minutes"] > f.max_time:
-                continue
-            if f.difficulty and data.get("difficulty", "").lower() != f.difficulty.lower():
-                continue
-            if f.min_rating and data.get("average_rating") and data["average_rating"] < f.min_rating:
-                continue
 
+    snapshot = catalog.snapshot()
+    cache_key = result_cache.key(
+        (snapshot.version, INGREDIENT_WEIGHTS.version), search_ingredients, payload.filters, limit, offset, view
+    )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        # Ratings and feedback counts move without a new version; the page shows the current ones
+        return [{**entry, "recipe": _current(snapshot, entry["recipe"], view)} for entry in cached]
+
+    term_matches = snapshot.match_table().lookup(search_ingredients)
+    matched_canonicals = set().union(*term_matches.values())
+
+    # Large catalogs are scored shard by shard in worker processes
+    top = None
+    if scoring_pool.enabled_for(snapshot):
+        top = scoring_pool.score(snapshot, matched_canonicals, payload.filters, offset + limit)
+    if top is None:
+        top = score_pantry(snapshot, matched_canonicals, payload.filters, offset + limit, INGREDIENT_WEIGHTS)
+
+    if not top:
+        raise HTTPException(status_code=404, detail="No matching recipes found.")
 
+    # Matching and missing ingredients are only rebuilt for the requested page
+    recipes = []
+    for recipe_id, match_score in top[offset:]:
+        recipe = snapshot.recipes[recipe_id]
+        recipe_all_ings, _ = normalize_recipe_ingredients(recipe.get("ingredients", []))
         recipes.append({
-            "recipe": data,
+            "recipe": summarize(recipe) if view == "summary" else recipe,
             "match_score": round(match_score, 2),
-            "matching_ingredients": matched_ingredients,
-            "missing_ingredients": missing_ingredients,
+            "matching_ingredients": [ri for ri in recipe_all_ings if ri in matched_canonicals],
+            "missing_ingredients": [ri for ri in recipe_all_ings if ri not in matched_canonicals],
         })
 
-    # Sort recipes by highest weighted score
-    recipes.sort(key=lambda x: x["match_score"], reverse=True)
-
-    if not recipes:
-        raise HTTPException(status_code=404, detail="No matching recipes found.")
-
+    result_cache.put(cache_key, recipes)
     return recipes
 
+@router.get("/catalog/stats")
+async def get_catalog_stats():
+    return {
+        **catalog.stats(),
+        "lemma_cache": lemma_cache.stats(),
+        "match_table": get_match_table().stats(),
+        "result_cache": result_cache.stats(),
+        "scoring_pool": scoring_pool.stats(),
+        "weights": INGREDIENT_WEIGHTS.stats(),
+        "ratings": rating_counters.stats(),
+        "bookmark_status": bookmark_status.stats(),
+    }
+
+@router.post("/weights/reload")
+def reload_weights(user: dict = Depends(get_current_user)):
+    """Reload ingredient weights from disk without a restart. Admins only."""
+    # Set with auth.set_custom_user_claims(uid, {"admin": True})
+    if not user.get("admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    # Cached results are keyed by the weights version, so a reload that changes weights misses them
+    INGREDIENT_WEIGHTS.reload(force=True)
+    return INGREDIENT_WEIGHTS.stats()
+
 # Search Recipes by Name 
 
 @router.get("/search")
-async def search_recipes(query: str = Query(..., min_length=2), filters: Optional[str] = None):
-    results = []
-    search_query = query.lower()
+def search_recipes(
+    query: str = Query(..., min_length=2),
+    filters: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    search_in: str = Query("name", description="Comma-separated fields: name, cuisine, ingredients"),
+    view: RecipeView = Query("full", description="summary returns card fields only"),
+):
+    fields = [f.strip() for f in search_in.split(",") if f.strip()]
+    if not fields or not set(fields) <= set(SEARCHABLE_FIELDS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"search_in must list fields from: {', '.join(SEARCHABLE_FIELDS)}",
+        )
 
     try:
         parsed_filters = RecipeFilters(**json.loads(filters)) if filters else None
     except Exception:
         parsed_filters = None
 
-    for doc in RECIPE_COLLECTION.stream():
-        data = doc.to_dict()
-        if search_query not in data.get("name", "").lower():
-            continue
-
-        # Apply filters
-        f = parsed_filters
-        if f:
-            if f.dietary and not all(tag.lower() in [d.lower() for d in data.get("dietary_restrictions", [])] for tag in f.dietary):
-                continue
-            if f.max_time and data.get("cooking_time_minutes") and data["cooking_time_minutes"] > f.max_time:
-                continue
-            if f.difficulty and data.get("difficulty", "").lower() != f.difficulty.lower():
-                continue
-            if f.min_rating and data.get("average_rating") and data["average_rating"] < f.min_rating:
-                continue
+    # Same bitmap filter path as /generate-recipes
+    snapshot = catalog.snapshot()
+    allowed = snapshot.metadata().mask(parsed_filters)
+    rows = snapshot.search_index().search(query, fields, allowed, limit)
 
-        data["id"] = doc.id
-        results.append(data)
+    recipe_ids = snapshot.recipe_ids()
+    results = [snapshot.recipes[recipe_ids[row]] for row in rows]
+    if view == "summary":
+        results = [summarize(data) for data in results]
 
     if not results:
          raise HTTPException(status_code=404, detail=f"No recipes found for '{query}'")
@@ -239,31 +277,47 @@ async def search_recipes(query: str = Query(..., min_length=2), filters: Optiona
 
 #My Recipes Endpoints
 
-@router.get("/users/me/recipes", response_model=List[Recipe])
-async def get_my_recipes(user: dict = Depends(get_current_user)):
+@router.get("/users/me/recipes")
+def get_my_recipes(
+    user: dict = Depends(get_current_user),
+    view: RecipeView = Query("full", description="summary returns card fields only"),
+):
     
     user_recipes = []
-    docs = RECIPE_COLLECTION.where("user_id", "==", user["uid"]).stream()
+    query = RECIPE_COLLECTION.where("user_id", "==", user["uid"])
+    # Summaries are projected server-side, so steps and nutrition never leave Firestore
+    if view == "summary":
+        query = query.select(SUMMARY_FIELDS)
+    # The view picks the model; a response_model union would pick it from whichever the data fits first
+    model = RecipeSummary if view == "summary" else Recipe
+    docs = query.stream()
     for doc in docs:
         data = doc.to_dict()
         data["id"] = doc.id
-        user_recipes.append(data)
+        user_recipes.append(model(**data))
     return user_recipes
 
 @router.post("/users/me/recipes", response_model=Recipe, status_code=status.HTTP_201_CREATED)
-async def create_my_recipe(recipe: RecipeCreate, user: dict = Depends(get_current_user)):
+def create_my_recipe(recipe: RecipeCreate, user: dict = Depends(get_current_user)):
     
     doc_ref = RECIPE_COLLECTION.document()
     data = recipe.dict()
     data["user_id"] = user["uid"]
-    doc_ref.set(data)
+    # The recipe and its ingredient counters land together or not at all
+    batch = db.batch()
+    batch.set(doc_ref, data)
+    write_deltas(batch, frequency_deltas(None, data["ingredients"]), recipe_delta=1)
+    batch.commit()
+
+    # New ingredients become matchable before the catalog listener catches up
+    get_match_table().add_vocabulary(normalize_recipe_ingredients(data["ingredients"])[0])
     
     response_data = data
     response_data["id"] = doc_ref.id
     return response_data
 
 @router.delete("/users/me/recipes/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_my_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
+def delete_my_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
     
     print(f"DELETE REQUEST START ")
     print(f"Attempting to delete recipe with ID: {recipe_id}")
@@ -295,7 +349,7 @@ async def delete_my_recipe(recipe_id: str, user: dict = Depends(get_current_user
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this recipe")
     
     print(" Deleting document")
-    doc_ref.delete()
+    _delete_recipe(db.transaction(), doc_ref)
     print("Recipe deleted successfully")
     print(f"DELETE REQUEST END ")
 
@@ -303,7 +357,7 @@ async def delete_my_recipe(recipe_id: str, user: dict = Depends(get_current_user
 
 
 @router.post("/recipes/{recipe_id}/rate")
-async def rate_recipe(
+def rate_recipe(
     recipe_id: str, 
     rating_data: RatingSubmission, 
     user: dict = Depends(get_current_user)
@@ -312,7 +366,7 @@ async def rate_recipe(
     return rating_service.submit_rating(recipe_id, rating_data.rating)
 
 @router.get("/recipes/{recipe_id}/rating")
-async def get_recipe_rating(recipe_id: str):
+def get_recipe_rating(recipe_id: str):
     
     return rating_service.get_recipe_rating(recipe_id)
 
@@ -320,7 +374,7 @@ async def get_recipe_rating(recipe_id: str):
 
 
 @router.post("/users/me/bookmarks/{recipe_id}")
-async def bookmark_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
+def bookmark_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
     
     try:
        
@@ -340,10 +394,10 @@ async def bookmark_recipe(recipe_id: str, user: dict = Depends(get_current_user)
             "recipe_name": recipe_data.get("name", "Unknown Recipe"),
             "recipe_image": recipe_data.get("image_url"),
             "bookmarked_at": firestore.SERVER_TIMESTAMP,
-            "recipe_data": recipe_data  
         }
         
         bookmarks_ref.set(bookmark_data)
+        bookmark_status.set(user["uid"], recipe_id, True)
         
         return {"message": "Recipe bookmarked successfully", "recipe_id": recipe_id}
         
@@ -351,7 +405,7 @@ async def bookmark_recipe(recipe_id: str, user: dict = Depends(get_current_user)
         raise HTTPException(status_code=500, detail=f"Failed to bookmark recipe: {str(e)}")
 
 @router.delete("/users/me/bookmarks/{recipe_id}")
-async def remove_bookmark(recipe_id: str, user: dict = Depends(get_current_user)):
+def remove_bookmark(recipe_id: str, user: dict = Depends(get_current_user)):
     
     try:
         bookmarks_ref = db.collection("users").document(user["uid"]).collection("bookmarks").document(recipe_id)
@@ -361,6 +415,7 @@ async def remove_bookmark(recipe_id: str, user: dict = Depends(get_current_user)
             raise HTTPException(status_code=404, detail="Bookmark not found")
         
         bookmarks_ref.delete()
+        bookmark_status.set(user["uid"], recipe_id, False)
         
         return {"message": "Bookmark removed successfully", "recipe_id": recipe_id}
         
@@ -368,36 +423,65 @@ async def remove_bookmark(recipe_id: str, user: dict = Depends(get_current_user)
         raise HTTPException(status_code=500, detail=f"Failed to remove bookmark: {str(e)}")
 
 @router.get("/users/me/bookmarks")
-async def get_my_bookmarks(user: dict = Depends(get_current_user)):
+def get_my_bookmarks(
+    response: Response,
+    user: dict = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} header of the previous page"),
+    view: RecipeView = Query("full", description="summary returns name, image and ID only"),
+):
     
     try:
-        bookmarks = []
         bookmarks_ref = db.collection("users").document(user["uid"]).collection("bookmarks")
+        query = newest_first(bookmarks_ref, "bookmarked_at", limit, cursor, BOOKMARK_FIELDS)
+        docs = list(query.stream())
+        set_next_cursor(response, docs, "bookmarked_at", limit)
+
+        if view == "summary":
+            return [
+                {"id": doc.get("recipe_id"), "name": doc.get("recipe_name"), "image_url": doc.get("recipe_image")}
+                for doc in docs
+            ]
+
+        # Bodies come from the catalog; only recipes it has not seen yet cost a read, all in one round trip
+        snapshot = catalog.snapshot()
+        recipe_ids = [doc.get("recipe_id") for doc in docs]
+        recipes = {recipe_id: snapshot.recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in snapshot.recipes}
+        missing = [RECIPE_COLLECTION.document(recipe_id) for recipe_id in recipe_ids if recipe_id not in recipes]
+        for recipe_doc in db.get_all(missing) if missing else []:
+            if recipe_doc.exists:
+                recipes[recipe_doc.id] = {**recipe_doc.to_dict(), "id": recipe_doc.id}
+
+        # Bookmarks of deleted recipes are left out
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
         
-        
-        docs = bookmarks_ref.order_by("bookmarked_at", direction=firestore.Query.DESCENDING).stream()
-        
-        for doc in docs:
-            data = doc.to_dict()
-            
-            if "recipe_data" in data:
-                recipe = data["recipe_data"]
-                recipe["id"] = data["recipe_id"]
-                bookmarks.append(recipe)
-        
-        return bookmarks
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bookmarks: {str(e)}")
 
+@router.get("/users/me/bookmarks/check")
+def check_bookmark_statuses(
+    recipe_ids: str = Query(..., description="Comma-separated recipe IDs, e.g. one results page"),
+    user: dict = Depends(get_current_user),
+):
+    ids = [recipe_id.strip() for recipe_id in recipe_ids.split(",") if recipe_id.strip()]
+    if not ids or len(ids) > MAX_BOOKMARK_CHECKS:
+        raise HTTPException(status_code=400, detail=f"recipe_ids must list 1 to {MAX_BOOKMARK_CHECKS} IDs")
+
+    try:
+        return {"statuses": bookmark_status.check(user["uid"], ids)}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to check bookmark status: {str(e)}")
+
 @router.get("/users/me/bookmarks/check/{recipe_id}")
-async def check_bookmark_status(recipe_id: str, user: dict = Depends(get_current_user)):
+def check_bookmark_status(recipe_id: str, user: dict = Depends(get_current_user)):
    
     try:
-        bookmarks_ref = db.collection("users").document(user["uid"]).collection("bookmarks").document(recipe_id)
-        bookmark_doc = bookmarks_ref.get()
+        statuses = bookmark_status.check(user["uid"], [recipe_id])
         
-        return {"is_bookmarked": bookmark_doc.exists, "recipe_id": recipe_id}
+        return {"is_bookmarked": statuses[recipe_id], "recipe_id": recipe_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check bookmark status: {str(e)}")
@@ -408,30 +492,34 @@ RECIPE_COLLECTION = db.collection("recipes")
 
 
 @router.post("/recipes/", response_model=Recipe)
-async def create_recipe(recipe: Recipe):
+def create_recipe(recipe: Recipe):
 
-    data = recipe.dict(exclude={"id"})
+    data = recipe.dict(exclude={"id", "feedback_count"})
     doc_ref = RECIPE_COLLECTION.document()
-    doc_ref.set(data)
+    batch = db.batch()
+    batch.set(doc_ref, data)
+    write_deltas(batch, frequency_deltas(None, data.get("ingredients")), recipe_delta=1)
+    batch.commit()
     stored = doc_ref.get().to_dict()
     stored["id"] = doc_ref.id
     return stored
 
 @router.patch("/recipes/{recipe_id}", response_model=Recipe)
-async def update_recipe(recipe_id: str, recipe: Recipe):
+def update_recipe(recipe_id: str, recipe: Recipe):
     """Update an existing recipe. You can toggle featured here."""
     doc_ref = RECIPE_COLLECTION.document(recipe_id)
-    if not doc_ref.get().exists:
+    update_data = recipe.dict(exclude_unset=True, exclude={"id", "feedback_count"})
+    if not _update_recipe(db.transaction(), doc_ref, update_data):
         raise HTTPException(status_code=404, detail="Recipe not found")
-    update_data = recipe.dict(exclude_unset=True, exclude={"id"})
-    doc_ref.update(update_data)
     updated = doc_ref.get().to_dict()
     updated["id"] = recipe_id
     return updated
 
 @router.get("/chefs-choice")
-async def get_chefs_choice():
+def get_chefs_choice(view: RecipeView = Query("full", description="summary returns card fields only")):
     query = RECIPE_COLLECTION.where("featured", "==", True)
+    if view == "summary":
+        query = query.select(SUMMARY_FIELDS)
     docs = query.stream()
     result = []
     for doc in docs:
@@ -441,7 +529,7 @@ async def get_chefs_choice():
     return result
 
 @router.get("/recipes/{recipe_id}")
-async def get_recipe_by_id(recipe_id: str):
+def get_recipe_by_id(recipe_id: str):
     doc = RECIPE_COLLECTION.document(recipe_id).get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Recipe not found")
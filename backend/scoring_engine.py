@@ -0,0 +1,130 @@
+import heapq
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models.recipe_model import RecipeFilters
+
+
+class ScoringEngine:
+    """Catalog held as a sparse recipe x ingredient matrix weighted by ingredient weights.
+
+    The matrix is stored column-compressed: each ingredient column is the posting
+    list of recipes using it, in ascending row order, so a pantry only touches the
+    columns it matches and a row range is a contiguous slice of each column.
+    """
+
+    def __init__(self, recipe_ids: List[str], ingredients: Dict[str, Tuple[List[str], List[str]]], weights: Dict[str, float]):
+        # Rows follow the snapshot's recipe_ids order, shared with the metadata store
+        self.recipe_ids = recipe_ids
+        self.columns = {name: j for j, name in enumerate(sorted({n for all_ings, _ in ingredients.values() for n in all_ings}))}
+
+        rows, cols, is_main = [], [], []
+        for r, recipe_id in enumerate(self.recipe_ids):
+            all_ings, main_ings = ingredients.get(recipe_id, ([], []))
+            main_set = set(main_ings)
+            # Repeated ingredients keep one entry each, exactly like the per-item loop did
+            for name in all_ings:
+                rows.append(r)
+                cols.append(self.columns[name])
+                is_main.append(name in main_set)
+
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        vocabulary = sorted(self.columns, key=self.columns.get)
+        column_weights = np.asarray([weights.get(name, 1) for name in vocabulary], dtype=np.float64)
+        values = column_weights[cols]
+
+        order = np.argsort(cols, kind="stable")
+        self.row_idx = rows[order]
+        self.values = values[order]
+        self.is_main = np.asarray(is_main, dtype=np.float64)[order]
+        self.col_ptr = np.zeros(len(self.columns) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.columns)), out=self.col_ptr[1:])
+        self.total_weight = np.bincount(rows, weights=values, minlength=len(self.recipe_ids))
+
+    @classmethod
+    def from_arrays(
+        cls,
+        recipe_ids: Sequence[str],
+        vocabulary: List[str],
+        col_ptr: np.ndarray,
+        row_idx: np.ndarray,
+        values: np.ndarray,
+        is_main: np.ndarray,
+        total_weight: np.ndarray,
+    ) -> "ScoringEngine":
+        """Engine over prebuilt column-compressed arrays, e.g. views of a mapped snapshot file."""
+        engine = cls.__new__(cls)
+        engine.recipe_ids = recipe_ids
+        engine.columns = {name: j for j, name in enumerate(vocabulary)}
+        engine.col_ptr = col_ptr
+        engine.row_idx = row_idx
+        engine.values = values
+        engine.is_main = is_main
+        engine.total_weight = total_weight
+        return engine
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def _span(self, j: int, row_range: Optional[Tuple[int, int]]) -> np.ndarray:
+        start, end = int(self.col_ptr[j]), int(self.col_ptr[j + 1])
+        if row_range is not None:
+            column = self.row_idx[start:end]
+            start, end = start + np.searchsorted(column, row_range[0]), start + np.searchsorted(column, row_range[1])
+        return np.arange(start, end)
+
+    def score(
+        self,
+        canonicals: Iterable[str],
+        allowed: Optional[np.ndarray] = None,
+        row_range: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows with a matched main ingredient and their normalized weighted scores.
+
+        allowed is an optional row bitmap, e.g. from MetadataStore.mask; row_range
+        (lo, hi) limits scoring to those rows, as a scoring pool shard does.
+        """
+        cols = [self.columns[c] for c in canonicals if c in self.columns]
+        if not cols:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        # Sparse matrix-vector product against the pantry mask: gather the
+        # nonzeros of the masked columns and sum them per recipe row
+        entries = np.concatenate([self._span(j, row_range) for j in cols])
+        candidate_rows, inverse = np.unique(self.row_idx[entries], return_inverse=True)
+        main_hits = np.bincount(inverse, weights=self.is_main[entries])
+        matched_weight = np.bincount(inverse, weights=self.values[entries])
+
+        keep = main_hits > 0
+        if allowed is not None:
+            keep &= allowed[candidate_rows]
+        rows = candidate_rows[keep]
+        matched_weight = matched_weight[keep]
+        total_weight = self.total_weight[rows]
+        scores = np.divide(matched_weight, total_weight, out=matched_weight.copy(), where=total_weight > 0)
+        return rows, scores
+
+    def top_k(self, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Best k (row, score) pairs by rounded score, ties in document ID order."""
+        rounded = np.round(scores, 2).tolist()
+        ranked = heapq.nlargest(k, zip(rounded, (-rows).tolist(), scores.tolist()))
+        return [(-neg_row, score) for _, neg_row, score in ranked]
+
+
+def score_pantry(
+    snapshot,
+    matched_canonicals: Set[str],
+    filters: Optional[RecipeFilters],
+    k: int,
+    weights: Dict[str, float],
+) -> List[Tuple[str, float]]:
+    """Best k (recipe id, score) pairs of a catalog snapshot for the matched pantry ingredients."""
+    # Metadata filters are plain bitmap operations, applied before any scoring
+    allowed = snapshot.metadata().mask(filters)
+    if not allowed.any():
+        return []
+
+    engine = snapshot.scoring_engine(weights)
+    rows, scores = engine.score(matched_canonicals, allowed)
+    return [(engine.recipe_ids[row], score) for row, score in engine.top_k(rows, scores, k)]
@@ -0,0 +1,188 @@
+import glob
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from catalog_snapshot import CatalogSnapshot
+from ingredients_weights import INGREDIENT_WEIGHTS
+from models.recipe_model import RecipeFilters
+from snapshot_file import MappedSnapshot, write_snapshot
+
+# 0 keeps all scoring on the request thread
+SCORING_POOL_SIZE = int(os.getenv("SCORING_POOL_SIZE", "0"))
+# Smaller catalogs are cheaper to score inline than to fan out
+SCORING_POOL_MIN_RECIPES = int(os.getenv("SCORING_POOL_MIN_RECIPES", "20000"))
+SCORING_POOL_TIMEOUT = float(os.getenv("SCORING_POOL_TIMEOUT", "10"))
+SCORING_POOL_DIR = os.getenv("SCORING_POOL_DIR", tempfile.gettempdir())
+
+
+# --- Worker process side ---
+
+# Every worker maps the same snapshot file; nothing is decoded or copied per worker
+_worker_snapshot: Optional[MappedSnapshot] = None
+
+
+def _load_snapshot(path: str, version: int) -> MappedSnapshot:
+    global _worker_snapshot
+    current = _worker_snapshot
+    if current is None or current.path != path or current.version != version:
+        # The shared snapshot file may already hold a newer version than the request
+        mapped = MappedSnapshot(path)
+        if mapped.version != version:
+            raise RuntimeError(f"{path} moved on to version {mapped.version}")
+        _worker_snapshot = mapped
+    return _worker_snapshot
+
+
+def _score_shard(
+    path: str,
+    version: int,
+    shard: int,
+    shard_count: int,
+    matched_canonicals: List[str],
+    allowed_bits: Optional[bytes],
+    k: int,
+) -> dict:
+    start = time.perf_counter()
+    snapshot = _load_snapshot(path, version)
+    # The file's matrix already carries the weights it was written with
+    engine = snapshot.scoring_engine(None)
+
+    # Shards are contiguous row ranges, i.e. document ID ranges, so merged ties keep document ID order
+    lo = len(engine) * shard // shard_count
+    hi = len(engine) * (shard + 1) // shard_count
+    allowed = None
+    if allowed_bits is not None:
+        allowed = np.unpackbits(np.frombuffer(allowed_bits, dtype=np.uint8), count=len(engine)).astype(bool)
+    rows, scores = engine.score(matched_canonicals, allowed, (lo, hi))
+    return {
+        "shard": shard,
+        "recipes": hi - lo,
+        "seconds": time.perf_counter() - start,
+        "top": [(engine.recipe_ids[row], score) for row, score in engine.top_k(rows, scores, k)],
+    }
+
+
+# --- Request side ---
+
+class ScoringPool:
+    """Process pool that scores catalog shards in parallel and merges them by score."""
+
+    def __init__(self, size: int, min_recipes: int):
+        self.size = size
+        self.min_recipes = min_recipes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.fallbacks = 0
+        self.last_shard_seconds: List[float] = []
+        self._total_shard_seconds = [0.0] * size
+
+    def start(self) -> None:
+        if self.size > 0:
+            # spawn rather than fork: the parent holds gRPC threads for Firestore
+            self._executor = ProcessPoolExecutor(max_workers=self.size, mp_context=get_context("spawn"))
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for path in glob.glob(self._snapshot_pattern()):
+            os.remove(path)
+
+    def enabled_for(self, snapshot: CatalogSnapshot) -> bool:
+        return self._executor is not None and len(snapshot) >= self.min_recipes
+
+    def _snapshot_pattern(self) -> str:
+        return os.path.join(SCORING_POOL_DIR, f"recipe-catalog-{os.getpid()}-*.snap")
+
+    def _write_snapshot(self, snapshot: CatalogSnapshot) -> str:
+        path = os.path.join(
+            SCORING_POOL_DIR,
+            f"recipe-catalog-{os.getpid()}-{snapshot.version}-{INGREDIENT_WEIGHTS.version}.snap",
+        )
+        # Same format as the shared catalog file, so workers only ever map
+        write_snapshot(snapshot, INGREDIENT_WEIGHTS, path)
+
+        # Keep the previous version for jobs still running against it
+        written = sorted(glob.glob(self._snapshot_pattern()), key=os.path.getmtime)
+        for old in written[:-2]:
+            os.remove(old)
+        return path
+
+    def score(
+        self,
+        snapshot: CatalogSnapshot,
+        matched_canonicals: Set[str],
+        filters: Optional[RecipeFilters],
+        k: int,
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Best k (recipe id, score) pairs across all shards.
+
+        Pantry terms are matched once by the caller, against the synced match table.
+        Returns None when the pool fails, so the caller can score inline instead.
+        """
+        futures = []
+        try:
+            # Workers map a shared snapshot file directly instead of unpickling a copy
+            if isinstance(snapshot, MappedSnapshot):
+                path = snapshot.path
+            else:
+                path = snapshot.derive(("scoring_pool_path", INGREDIENT_WEIGHTS.version), self._write_snapshot)
+            # The parent's mask carries live rating patches the file may not have yet
+            allowed_bits = np.packbits(snapshot.metadata().mask(filters)).tobytes() if filters else None
+            futures = [
+                self._executor.submit(
+                    _score_shard, path, snapshot.version, shard, self.size, sorted(matched_canonicals), allowed_bits, k
+                )
+                for shard in range(self.size)
+            ]
+            # One deadline for the whole job, not one per shard
+            _, not_done = wait(futures, timeout=SCORING_POOL_TIMEOUT, return_when=FIRST_EXCEPTION)
+            if not_done:
+                raise TimeoutError(f"{len(not_done)} of {len(futures)} shards unfinished")
+            results = [future.result() for future in futures]
+        except Exception as e:
+            # Shards not yet picked up are dropped, so a slow job does not back up the pool
+            for future in futures:
+                future.cancel()
+            print(f"Scoring pool failed, scoring inline: {e}")
+            with self._lock:
+                self.fallbacks += 1
+            return None
+
+        with self._lock:
+            self.jobs += 1
+            self.last_shard_seconds = [round(r["seconds"], 4) for r in results]
+            for r in results:
+                self._total_shard_seconds[r["shard"]] += r["seconds"]
+
+        # Same order as ScoringEngine.top_k: rounded score first, then document ID
+        merged = sorted(
+            (pair for r in results for pair in r["top"]),
+            key=lambda pair: (-round(pair[1], 2), pair[0]),
+        )
+        return merged[:k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "running": self._executor is not None,
+                "min_recipes": self.min_recipes,
+                "jobs": self.jobs,
+                "fallbacks": self.fallbacks,
+                "last_shard_seconds": self.last_shard_seconds,
+                "avg_shard_seconds": [
+                    round(total / self.jobs, 4) if self.jobs else None for total in self._total_shard_seconds
+                ],
+            }
+
+
+scoring_pool = ScoringPool(SCORING_POOL_SIZE, SCORING_POOL_MIN_RECIPES)
@@ -0,0 +1,108 @@
+import heapq
+import re
+import numpy as np
+from bisect import bisect_left
+from collections import defaultdict
+from rapidfuzz import fuzz, process
+from typing import Dict, List, Optional, Sequence, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+SEARCHABLE_FIELDS = ("name", "cuisine", "ingredients")
+FIELD_BOOSTS = {"name": 3.0, "cuisine": 2.0, "ingredients": 1.0}
+
+# Match quality per query token: exact token, token prefix, or a RapidFuzz typo match
+EXACT = 1.0
+PREFIX = 0.7
+FUZZY = 0.5
+FUZZY_SCORE_CUTOFF = 80
+FUZZY_CANDIDATES = 5
+# Bonus when the whole query appears in the recipe name, the old substring rule
+PHRASE_BONUS = 2.0
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Token and prefix index over recipe names, cuisines and ingredients.
+
+    Rows follow the snapshot's recipe_ids order, so metadata masks apply directly.
+    """
+
+    def __init__(self, recipe_ids: List[str], recipes: Dict[str, dict], ingredients: Dict[str, Tuple[List[str], List[str]]]):
+        self.names = [(recipes[recipe_id].get("name") or "").lower() for recipe_id in recipe_ids]
+
+        postings = {field: defaultdict(set) for field in SEARCHABLE_FIELDS}
+        for row, recipe_id in enumerate(recipe_ids):
+            data = recipes[recipe_id]
+            for token in tokenize(data.get("name") or ""):
+                postings["name"][token].add(row)
+            for token in tokenize(data.get("cuisine") or ""):
+                postings["cuisine"][token].add(row)
+            all_ings, _ = ingredients.get(recipe_id, ([], []))
+            for canonical in set(all_ings):
+                for token in tokenize(canonical):
+                    postings["ingredients"][token].add(row)
+
+        self._postings = {field: dict(p) for field, p in postings.items()}
+        # Sorted token lists answer prefix queries with a binary search
+        self._tokens = {field: sorted(p) for field, p in self._postings.items()}
+
+    def _token_hits(self, token: str, field: str) -> Dict[int, float]:
+        postings = self._postings[field]
+        tokens = self._tokens[field]
+        hits: Dict[int, float] = {}
+
+        i = bisect_left(tokens, token)
+        while i < len(tokens) and tokens[i].startswith(token):
+            quality = EXACT if tokens[i] == token else PREFIX
+            for row in postings[tokens[i]]:
+                hits[row] = max(hits.get(row, 0.0), quality)
+            i += 1
+
+        # Typo tolerance only kicks in when nothing matched exactly or by prefix
+        if not hits and len(token) >= 3:
+            for candidate, score, _ in process.extract(
+                token, tokens, scorer=fuzz.ratio, score_cutoff=FUZZY_SCORE_CUTOFF, limit=FUZZY_CANDIDATES
+            ):
+                for row in postings[candidate]:
+                    hits[row] = max(hits.get(row, 0.0), FUZZY * score / 100)
+        return hits
+
+    def search(
+        self,
+        query: str,
+        fields: Sequence[str] = ("name",),
+        allowed: Optional[np.ndarray] = None,
+        limit: int = 20,
+    ) -> List[int]:
+        """Rows matching every query token in one of the fields, most relevant first."""
+        scores: Optional[Dict[int, float]] = None
+        for token in tokenize(query):
+            token_scores: Dict[int, float] = {}
+            for field in fields:
+                boost = FIELD_BOOSTS[field]
+                for row, quality in self._token_hits(token, field).items():
+                    token_scores[row] = max(token_scores.get(row, 0.0), boost * quality)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {row: score + token_scores[row] for row, score in scores.items() if row in token_scores}
+            if not scores:
+                return []
+
+        # The query had no searchable tokens
+        if scores is None:
+            return []
+
+        phrase = query.lower().strip()
+        ranked = []
+        for row, score in scores.items():
+            if allowed is not None and not allowed[row]:
+                continue
+            if phrase in self.names[row]:
+                score += PHRASE_BONUS
+            ranked.append((score, -row))
+        return [-neg_row for _, neg_row in heapq.nlargest(limit, ranked)]
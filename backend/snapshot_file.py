@@ -0,0 +1,274 @@
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from catalog_snapshot import CatalogSnapshot
+from match_table import MatchTable
+from metadata_store import MetadataStore
+from scoring_engine import ScoringEngine
+
+# Bump when the section layout changes; readers refuse files they do not understand
+MAGIC = b"RCSNAP02"
+ALIGNMENT = 64
+# Built per process from the documents, none of them reading ratings or feedback counts
+LIVE_INDEPENDENT = ("ingredients", "search_index", "match_table")
+
+
+def _encode_default(value: Any) -> Any:
+    # Firestore timestamps come back as datetime subclasses
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _string_column(values: List[str]) -> np.ndarray:
+    encoded = [value.encode("utf-8") for value in values]
+    return np.array(encoded, dtype=f"S{max(map(len, encoded), default=1) or 1}")
+
+
+def _blob_column(values: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(values), dtype=np.uint8)
+
+
+def _bitmap_sections(bitmaps: Dict[str, np.ndarray], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    keys = sorted(bitmaps)
+    bits = np.zeros((len(keys), size), dtype=bool)
+    for i, key in enumerate(keys):
+        bits[i] = bitmaps[key]
+    return _string_column(keys), bits
+
+
+def write_snapshot(snapshot: CatalogSnapshot, weights: Mapping[str, float], path: str) -> None:
+    """Serialize a snapshot into one file that every worker process can map read-only.
+
+    The file is written next to its final path and swapped in with os.replace,
+    so readers see either the previous snapshot or this one, never a mix.
+    """
+    recipe_ids = snapshot.recipe_ids()
+    engine = snapshot.scoring_engine(weights)
+    vocabulary = sorted(engine.columns, key=engine.columns.get)
+    lemmas = snapshot.lemmas()
+    metadata = snapshot.metadata()
+    dietary_keys, dietary_bits = _bitmap_sections(metadata.dietary, len(recipe_ids))
+    difficulty_keys, difficulty_bits = _bitmap_sections(metadata.difficulty, len(recipe_ids))
+
+    doc_offsets, doc_blob = _blob_column(
+        [json.dumps(snapshot.recipes[recipe_id], default=_encode_default).encode("utf-8") for recipe_id in recipe_ids]
+    )
+    sections = {
+        "recipe_ids": _string_column(recipe_ids),
+        "doc_offsets": doc_offsets,
+        "doc_blob": doc_blob,
+        "vocabulary": _string_column(vocabulary),
+        "lemmas": _string_column([lemmas[name] for name in vocabulary]),
+        "weights": np.asarray([weights.get(name, 1) for name in vocabulary], dtype=np.float64),
+        "col_ptr": engine.col_ptr,
+        "row_idx": engine.row_idx,
+        "values": engine.values,
+        "is_main": engine.is_main,
+        "total_weight": engine.total_weight,
+        "dietary_keys": dietary_keys,
+        "dietary_bits": dietary_bits,
+        "difficulty_keys": difficulty_keys,
+        "difficulty_bits": difficulty_bits,
+        "time_values": metadata.time_values,
+        "time_rows": metadata.time_rows,
+        "rating_values": metadata.rating_values,
+        "rating_rows": metadata.rating_rows,
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        "version": snapshot.version,
+        "weights_version": getattr(weights, "version", None),
+        "written_at": time.time(),
+        "recipes": len(recipe_ids),
+        "sections": layout,
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_stamp(path: str) -> Tuple[int, Optional[int], float]:
+    """(catalog version, weights version, write time) of a snapshot file, without mapping its sections."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot file")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    return header["version"], header.get("weights_version"), header["written_at"]
+
+
+class SnapshotFile:
+    """Read-only memory map of a snapshot file; every section is a zero-copy numpy view."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping outlives the descriptor and keeps the inode alive after a swap
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot file")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[header_start:header_start + header_len])
+        data_start = -(-(header_start + header_len) // ALIGNMENT) * ALIGNMENT
+
+        self.sections: Dict[str, np.ndarray] = {}
+        for name, section in self.header["sections"].items():
+            dtype = np.dtype(section["dtype"])
+            shape = tuple(section["shape"])
+            self.sections[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=int(np.prod(shape)), offset=data_start + section["offset"]
+            ).reshape(shape)
+
+    @property
+    def version(self) -> int:
+        return self.header["version"]
+
+    @property
+    def written_at(self) -> float:
+        return self.header["written_at"]
+
+    @property
+    def stamp(self) -> Tuple[int, Optional[int], float]:
+        return self.header["version"], self.header.get("weights_version"), self.header["written_at"]
+
+
+class StringColumn(Sequence):
+    """List-like view over a fixed-width UTF-8 column, decoded one entry at a time."""
+
+    def __init__(self, column: np.ndarray):
+        self._column = column
+
+    def __len__(self) -> int:
+        return len(self._column)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [value.decode("utf-8") for value in self._column[i]]
+        return self._column[i].decode("utf-8")
+
+
+class MappedRecipes(Mapping):
+    """recipe id -> document, decoded from the mapped JSON blob on access.
+
+    Documents are not kept once decoded, so resident memory stays with the shared pages.
+    """
+
+    def __init__(self, recipe_ids: StringColumn, offsets: np.ndarray, blob: np.ndarray):
+        self._recipe_ids = recipe_ids
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._recipe_ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._recipe_ids)
+
+    def _row(self, recipe_id: str) -> int:
+        # recipe_ids is sorted, the same row order as the rest of the snapshot
+        row = bisect_left(self._recipe_ids, recipe_id)
+        if row == len(self._recipe_ids) or self._recipe_ids[row] != recipe_id:
+            raise KeyError(recipe_id)
+        return row
+
+    def __contains__(self, recipe_id: object) -> bool:
+        try:
+            self._row(recipe_id)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __getitem__(self, recipe_id: str) -> dict:
+        row = self._row(recipe_id)
+        return json.loads(self._blob[self._offsets[row]:self._offsets[row + 1]].tobytes())
+
+
+def _bitmaps(keys: np.ndarray, bits: np.ndarray) -> Dict[str, np.ndarray]:
+    return dict(zip(StringColumn(keys)[:], bits))
+
+
+class MappedSnapshot(CatalogSnapshot):
+    """Catalog snapshot backed by a shared snapshot file instead of a process-local dict.
+
+    Recipe IDs, vocabulary lemmas, weights, the scoring matrix and the metadata
+    columns come straight from the mapped file. Only the search index and the
+    per-recipe ingredient lists are still built in each process, lazily, by
+    decoding documents.
+    """
+
+    def __init__(self, path: str, table: Optional[MatchTable] = None):
+        self.file = SnapshotFile(path)
+        self.path = path
+        sections = self.file.sections
+        recipe_ids = StringColumn(sections["recipe_ids"])
+        super().__init__(
+            self.file.version, MappedRecipes(recipe_ids, sections["doc_offsets"], sections["doc_blob"]), table
+        )
+
+        vocabulary = StringColumn(sections["vocabulary"])[:]
+        lemmas = StringColumn(sections["lemmas"])[:]
+        self._derived.update({
+            "recipe_ids": recipe_ids,
+            "vocabulary": vocabulary,
+            "lemmas": dict(zip(vocabulary, lemmas)),
+            "metadata": MetadataStore.from_arrays(
+                recipe_ids,
+                _bitmaps(sections["dietary_keys"], sections["dietary_bits"]),
+                _bitmaps(sections["difficulty_keys"], sections["difficulty_bits"]),
+                sections["time_values"],
+                sections["time_rows"],
+                sections["rating_values"],
+                sections["rating_rows"],
+            ),
+        })
+        self._engine = ScoringEngine.from_arrays(
+            recipe_ids,
+            vocabulary,
+            sections["col_ptr"],
+            sections["row_idx"],
+            sections["values"],
+            sections["is_main"],
+            sections["total_weight"],
+        )
+
+    def adopt_derived(self, previous: "MappedSnapshot") -> None:
+        """Reuse what previous built in this process; valid when only live counters differ."""
+        with previous._lock:
+            built = {name: previous._derived[name] for name in LIVE_INDEPENDENT if name in previous._derived}
+        with self._lock:
+            self._derived.update(built)
+
+    def scoring_engine(self, weights: Mapping[str, float]) -> ScoringEngine:
+        # The leader applied its weights when it wrote the file, and rewrites it when they change
+        return self._engine
+
+    def weights(self) -> Dict[str, float]:
+        return dict(zip(self.vocabulary(), self.file.sections["weights"].tolist()))
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from firebase_admin import firestore
+
+# Lists paginated with a cursor send the next page's cursor in this header,
+# so the response body stays a plain list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, doc_id: str) -> str:
+    raw = json.dumps({"at": timestamp.isoformat(), "id": doc_id})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(raw["at"]), raw["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def newest_first(collection_ref, field: str, limit: int, cursor: Optional[str] = None, fields: Optional[List[str]] = None):
+    """Query one page of a collection, newest first by a timestamp field, projected to fields if given.
+
+    Ties on the timestamp are broken by document ID, so a cursor made from a
+    page's last document never skips or repeats one.
+    """
+    query = collection_ref.select(fields) if fields is not None else collection_ref
+    query = (
+        query.order_by(field, direction=firestore.Query.DESCENDING)
+        .order_by(firestore.FieldPath.document_id(), direction=firestore.Query.DESCENDING)
+    )
+    if cursor is not None:
+        timestamp, doc_id = decode_cursor(cursor)
+        query = query.start_after({field: timestamp, firestore.FieldPath.document_id(): collection_ref.document(doc_id)})
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, docs: list, field: str, limit: int) -> None:
+    # A short page is the last one
+    if len(docs) == limit and docs[-1].get(field) is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1].get(field), docs[-1].id)
@@ -108,8 +108,8 @@ export default function RecipeDetailPage({ params }: { params: Promise<{ id: str
         { headers: { Authorization: `Bearer ${token}` } }
       );
       setFeedbacks(prev => [
-        ...prev,
-        { user: currentUser?.displayName || 'You', text: newFeedback }
+        { user: currentUser?.displayName || 'You', text: newFeedback },
+        ...prev
       ]);
       setNewFeedback('');
     } catch (err) {